@@ -1,6 +1,84 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+from utils.time_rollup import time_rollup
+
+# 납기일별 수요 수량만 사용
+TABLES = {
+    "DEMAND.parquet": {"columns": ["DUE_DATE", "DEMAND_QTY"]},
+}
+
+def build_rollup(tables):
+    """DUE_DATE 기준 일/주/월별 DEMAND_QTY 합계와 누적 합계를 계산하는 함수"""
+    df = tables.load("DEMAND.parquet", **TABLES["DEMAND.parquet"])
+    rollup = time_rollup(df, "DUE_DATE", "DEMAND_QTY")
+    return {
+        freq: grouped.rename(columns={"PERIOD_START": period_col, "CUM_DEMAND_QTY": "CUMULATIVE_DEMAND"})
+        for (freq, grouped), period_col in zip(rollup.items(), ["DUE_DATE", "WEEK", "MONTH"])
+    }
+
+# 그래프별 (주기, 기간 컬럼, 막대 라벨, 막대 색상, 누적 선 색상)
+CHARTS = [
+    ("daily", "DUE_DATE", "일별 DEMAND_QTY", "skyblue", "red"),
+    ("weekly", "WEEK", "주별 DEMAND_QTY", "lightgreen", "orange"),
+    ("monthly", "MONTH", "월별 DEMAND_QTY", "gold", "purple"),
+]
+
+# 처음 화면에 보여줄 구간 길이 (이후 범위 조정은 브라우저에서 처리)
+INITIAL_POINTS = 11
+
+def create_chart(grouped_df, period_col, label, bar_color, line_color):
+    """전체 기간 막대(DEMAND_QTY) + 누적 선 그래프 생성 (하단 범위 슬라이더로 구간 선택)"""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=grouped_df[period_col],
+        y=grouped_df['DEMAND_QTY'],
+        name=label,
+        marker_color=bar_color,
+        yaxis='y1'
+    ))
+    fig.add_trace(go.Scatter(
+        x=grouped_df[period_col],
+        y=grouped_df['CUMULATIVE_DEMAND'],
+        mode='lines',
+        name='누적 DEMAND',
+        line=dict(color=line_color),
+        yaxis='y2'
+    ))
+
+    # 처음에는 앞쪽 구간만 표시하고, 나머지는 범위 슬라이더로 이동
+    periods = grouped_df[period_col]
+    initial_range = None
+    if len(periods) > INITIAL_POINTS:
+        initial_range = [periods.iloc[0], periods.iloc[INITIAL_POINTS - 1]]
+
+    fig.update_layout(
+        xaxis=dict(
+            title=period_col,
+            range=initial_range,
+            rangeslider=dict(visible=True),
+            tickangle=-45
+        ),
+        yaxis=dict(title="DEMAND_QTY", side="left"),
+        yaxis2=dict(
+            title="CUMULATIVE DEMAND",
+            overlaying='y',
+            side="right",
+            showgrid=False
+        ),
+        legend=dict(x=0, y=1.1, orientation="h"),
+        height=500
+    )
+    return fig
+
+def build_charts(tables):
+    """일/주/월별 그래프를 업로드당 한 번만 생성하는 함수"""
+    rollup = tables.aggregate("demand_analysis.rollup", build_rollup)
+    return {
+        freq: create_chart(rollup[freq], period_col, label, bar_color, line_color)
+        for freq, period_col, label, bar_color, line_color in CHARTS
+    }
+
+AGGREGATES = {"demand_analysis.charts": build_charts}
 
 def show_page(uploaded_files):
     st.title("DEMAND_QTY 분석 (일별, 주별, 월별)")
@@ -10,97 +88,14 @@ def show_page(uploaded_files):
         st.error("DEMAND.parquet 파일이 업로드되지 않았습니다.")
         return
 
-    # Parquet 파일 읽기
-    df = pd.read_parquet(uploaded_files["DEMAND.parquet"], engine='pyarrow')
-
-    # 날짜 데이터 형식 변환
-    df['DUE_DATE'] = pd.to_datetime(df['DUE_DATE'])
+    # 집계와 그래프는 업로드당 한 번만 생성하고, 구간 선택은 그래프의 범위 슬라이더로 처리
+    charts = uploaded_files.aggregate("demand_analysis.charts", build_charts)
 
-    # ---------------------
-    # 일별 분석
-    # ---------------------
     st.subheader("1. 일별 DEMAND_QTY 분석")
+    st.plotly_chart(charts["daily"], use_container_width=True)
 
-    daily_grouped_df = (
-        df.groupby("DUE_DATE", as_index=False)["DEMAND_QTY"].sum()
-        .sort_values("DUE_DATE")
-        .reset_index(drop=True)
-    )
-    daily_grouped_df['CUMULATIVE_DEMAND'] = daily_grouped_df['DEMAND_QTY'].cumsum()
-
-    # 슬라이더 설정
-    start, end = st.slider("범위를 선택하세요", 0, len(daily_grouped_df)-1, (0, min(10, len(daily_grouped_df)-1)))
-
-    # 일별 그래프 (Matplotlib 사용)
-    fig1, ax1 = plt.subplots(figsize=(12, 6))
-    ax1.bar(daily_grouped_df['DUE_DATE'][start:end+1], daily_grouped_df['DEMAND_QTY'][start:end+1], color='skyblue', label='일별 DEMAND_QTY')
-    ax2 = ax1.twinx()
-    ax2.plot(daily_grouped_df['DUE_DATE'][start:end+1], daily_grouped_df['CUMULATIVE_DEMAND'][start:end+1], color='red', label='누적 DEMAND')
-    ax1.set_xlabel("DUE_DATE")
-    ax1.set_ylabel("DEMAND_QTY", color='blue')
-    ax2.set_ylabel("CUMULATIVE DEMAND", color='red')
-    ax1.tick_params(axis='x', rotation=45)
-    ax1.tick_params(axis='y', labelcolor='blue')
-    ax2.tick_params(axis='y', labelcolor='red')
-    fig1.legend(loc="upper left")
-    st.pyplot(fig1)
-
-    # ---------------------
-    # 주별 분석
-    # ---------------------
     st.subheader("2. 주별 DEMAND_QTY 분석")
+    st.plotly_chart(charts["weekly"], use_container_width=True)
 
-    df['WEEK'] = df['DUE_DATE'].dt.to_period('W').apply(lambda r: r.start_time)
-    weekly_grouped_df = (
-        df.groupby("WEEK", as_index=False)["DEMAND_QTY"].sum()
-        .sort_values("WEEK")
-        .reset_index(drop=True)
-    )
-    weekly_grouped_df['CUMULATIVE_DEMAND'] = weekly_grouped_df['DEMAND_QTY'].cumsum()
-
-    # 슬라이더 설정
-    start, end = st.slider("주별 범위를 선택하세요", 0, len(weekly_grouped_df)-1, (0, min(10, len(weekly_grouped_df)-1)))
-
-    # 주별 그래프 (Matplotlib 사용)
-    fig2, ax3 = plt.subplots(figsize=(12, 6))
-    ax3.bar(weekly_grouped_df['WEEK'][start:end+1], weekly_grouped_df['DEMAND_QTY'][start:end+1], color='lightgreen', label='주별 DEMAND_QTY')
-    ax4 = ax3.twinx()
-    ax4.plot(weekly_grouped_df['WEEK'][start:end+1], weekly_grouped_df['CUMULATIVE_DEMAND'][start:end+1], color='orange', label='누적 DEMAND')
-    ax3.set_xlabel("WEEK")
-    ax3.set_ylabel("DEMAND_QTY", color='green')
-    ax4.set_ylabel("CUMULATIVE DEMAND", color='orange')
-    ax3.tick_params(axis='x', rotation=45)
-    ax3.tick_params(axis='y', labelcolor='green')
-    ax4.tick_params(axis='y', labelcolor='orange')
-    fig2.legend(loc="upper left")
-    st.pyplot(fig2)
-
-    # ---------------------
-    # 월별 분석
-    # ---------------------
     st.subheader("3. 월별 DEMAND_QTY 분석")
-
-    df['MONTH'] = df['DUE_DATE'].dt.to_period('M').apply(lambda r: r.start_time)
-    monthly_grouped_df = (
-        df.groupby("MONTH", as_index=False)["DEMAND_QTY"].sum()
-        .sort_values("MONTH")
-        .reset_index(drop=True)
-    )
-    monthly_grouped_df['CUMULATIVE_DEMAND'] = monthly_grouped_df['DEMAND_QTY'].cumsum()
-
-    # 슬라이더 설정
-    start, end = st.slider("월별 범위를 선택하세요", 0, len(monthly_grouped_df)-1, (0, min(10, len(monthly_grouped_df)-1)))
-
-    # 월별 그래프 (Matplotlib 사용)
-    fig3, ax5 = plt.subplots(figsize=(12, 6))
-    ax5.bar(monthly_grouped_df['MONTH'][start:end+1], monthly_grouped_df['DEMAND_QTY'][start:end+1], color='gold', label='월별 DEMAND_QTY')
-    ax6 = ax5.twinx()
-    ax6.plot(monthly_grouped_df['MONTH'][start:end+1], monthly_grouped_df['CUMULATIVE_DEMAND'][start:end+1], color='purple', label='누적 DEMAND')
-    ax5.set_xlabel("MONTH")
-    ax5.set_ylabel("DEMAND_QTY", color='darkorange')
-    ax6.set_ylabel("CUMULATIVE DEMAND", color='purple')
-    ax5.tick_params(axis='x', rotation=45)
-    ax5.tick_params(axis='y', labelcolor='darkorange')
-    ax6.tick_params(axis='y', labelcolor='purple')
-    fig3.legend(loc="upper left")
-    st.pyplot(fig3)
+    st.plotly_chart(charts["monthly"], use_container_width=True)
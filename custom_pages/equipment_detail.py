@@ -3,126 +3,155 @@ import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
 
-def show_page(uploaded_files):
-    st.title("장비 그룹별 개별 가동율 현황")
-
-    # 파일 검사
-    if "CAPA_ALLOCATION_INFO.parquet" not in uploaded_files or "RES_MASTER.parquet" not in uploaded_files:
-        st.error("CAPA_ALLOCATION_INFO.parquet와 RES_MASTER.parquet 파일이 모두 필요합니다.")
-        return
-
-    # Parquet 파일 읽기
-    df = pd.read_parquet(uploaded_files["CAPA_ALLOCATION_INFO.parquet"], engine='pyarrow')
-    res_master = pd.read_parquet(uploaded_files["RES_MASTER.parquet"], engine='pyarrow')
-
-    # RES_MASTER 테이블에서 RES_ID와 RES_NAME 가져오기
-    res_master = res_master[["RES_ID", "RES_NAME"]]
-
-    # 데이터 처리 공통 함수
-    def process_data(df_filtered, group_col):
-        grouped = df_filtered.groupby(group_col).agg({
-            'TOTAL_CAPA': 'sum',
-            'OFF_TIME_CAPA': 'sum',
-            'ALLOCATION_CAPA': 'sum',
-            'PM_CAPA': 'sum',
-            'SETUP_CAPA': 'sum',
-            'REMAIN_CAPA': 'sum',
-        }).reset_index()
-
-        # 비율 계산 및 각 비율 컬럼 추가
-        grouped['ALLOCATION_CAPA_%'] = (grouped['ALLOCATION_CAPA'] / grouped['TOTAL_CAPA']) * 100
-        grouped['SETUP_CAPA_%'] = (grouped['SETUP_CAPA'] / grouped['TOTAL_CAPA']) * 100
-        grouped['PM_CAPA_%'] = (grouped['PM_CAPA'] / grouped['TOTAL_CAPA']) * 100
-        grouped['OFF_TIME_CAPA_%'] = (grouped['OFF_TIME_CAPA'] / grouped['TOTAL_CAPA']) * 100
-        grouped['REMAIN_CAPA_%'] = (grouped['REMAIN_CAPA'] / grouped['TOTAL_CAPA']) * 100
-
-        # customdata 생성
-        grouped['customdata'] = grouped.apply(
-            lambda row: [
-                (row['ALLOCATION_CAPA_%'], row['ALLOCATION_CAPA'], row['TOTAL_CAPA']),
-                (row['SETUP_CAPA_%'], row['SETUP_CAPA'], row['TOTAL_CAPA']),
-                (row['PM_CAPA_%'], row['PM_CAPA'], row['TOTAL_CAPA']),
-                (row['OFF_TIME_CAPA_%'], row['OFF_TIME_CAPA'], row['TOTAL_CAPA']),
-                (row['REMAIN_CAPA_%'], row['REMAIN_CAPA'], row['TOTAL_CAPA']),
-            ], axis=1
-        )
-
-        # ALLOCATION_CAPA_% 기준으로 데이터 정렬
-        grouped = grouped.sort_values(by='ALLOCATION_CAPA_%', ascending=False)
-
-        return grouped
-
-    # 그래프 생성 함수
-    def create_chart(grouped, group_col, title):
-        categories = ['ALLOCATION_CAPA', 'SETUP_CAPA', 'PM_CAPA', 'OFF_TIME_CAPA', 'REMAIN_CAPA']
-        colors = ['#66CC66', '#FF6666', '#FFE066', '#808080', '#F2F2F2']
-        fig = go.Figure()
-
-        for i, (category, color) in enumerate(zip(categories, colors)):
-            fig.add_trace(
-                go.Bar(
-                    x=grouped[group_col],
-                    y=grouped[f'{category}_%'],
-                    name=category.replace('_', ' ').capitalize(),
-                    marker_color=color,
-                    customdata=grouped['customdata'],
-                    hovertemplate=(
-                        f"{category.replace('_', ' ').capitalize()}: %{{customdata[{i}][0]:.2f}}% "
-                        f"(%{{customdata[{i}][1]:,.0f}}/%{{customdata[{i}][2]:,.0f}})<extra></extra>"
-                    ),
-                )
+# RES_MASTER의 RES_NAME은 TARGET_ID별 집계 이름에 결합
+TABLES = {
+    "CAPA_ALLOCATION_INFO.parquet": {
+        "columns": [
+            "RES_GROUP_ID", "TARGET_ID",
+            "TOTAL_CAPA", "OFF_TIME_CAPA", "ALLOCATION_CAPA", "PM_CAPA", "SETUP_CAPA", "REMAIN_CAPA",
+        ],
+        "categorical": True,
+    },
+    "RES_MASTER.parquet": {"columns": ["RES_ID", "RES_NAME"], "categorical": True},
+}
+
+# CAPA 항목 (차트의 누적 순서)
+CAPA_COLUMNS = ['ALLOCATION_CAPA', 'SETUP_CAPA', 'PM_CAPA', 'OFF_TIME_CAPA', 'REMAIN_CAPA']
+
+def process_data(grouped):
+    """CAPA 합계에 비율 컬럼을 추가하고 ALLOCATION_CAPA_% 기준으로 정렬하는 함수"""
+    total = grouped[['TOTAL_CAPA']].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = grouped[CAPA_COLUMNS].to_numpy(dtype=float) / total * 100
+    grouped[[f'{category}_%' for category in CAPA_COLUMNS]] = percent
+
+    # ALLOCATION_CAPA_% 기준으로 데이터 정렬
+    return grouped.sort_values(by='ALLOCATION_CAPA_%', ascending=False, kind='stable')
+
+def build_group_index(tables):
+    """RES_GROUP_ID별 행 위치와 RES_NAME이 결합된 TARGET_ID별 CAPA 집계를 한 번에 만드는 함수
+
+    반환값: (RES_GROUP_ID별 집계, {"rows": 행 위치, "targets": TARGET_ID별 집계})
+    rows와 targets는 RES_GROUP_ID 인덱스로 정렬된 표 하나씩이며, group_slice()로 한 그룹 구간을 꺼낸다.
+    """
+    df = tables.load("CAPA_ALLOCATION_INFO.parquet", **TABLES["CAPA_ALLOCATION_INFO.parquet"])
+    res_master = tables.load("RES_MASTER.parquet", **TABLES["RES_MASTER.parquet"])
+    sum_columns = ['TOTAL_CAPA'] + CAPA_COLUMNS
+
+    # RES_GROUP_ID별 집계 (선택 박스 순서)
+    grouped_time = process_data(df.groupby('RES_GROUP_ID', observed=True)[sum_columns].sum().reset_index())
+
+    # (RES_GROUP_ID, TARGET_ID)별로 먼저 합산한 뒤 RES_MASTER와 한 번만 결합하여 RES_NAME + '_' + TARGET_ID 생성
+    by_target = df.groupby(['RES_GROUP_ID', 'TARGET_ID'], observed=True)[sum_columns].sum().reset_index()
+    by_target = pd.merge(by_target, res_master, left_on='TARGET_ID', right_on='RES_ID', how='left')
+    by_target['RES_NAME+RES_ID'] = by_target['RES_NAME'].fillna('Unknown') + '_' + by_target['TARGET_ID']
+    by_target = process_data(
+        by_target.groupby(['RES_GROUP_ID', 'RES_NAME+RES_ID'], observed=True)[sum_columns].sum().reset_index()
+    )
+    # 그룹별 작은 표 대신 RES_GROUP_ID로 정렬한 긴 표 하나씩 보관 (그룹 안의 순서는 그대로 유지)
+    rows = pd.DataFrame({'RES_GROUP_ID': df['RES_GROUP_ID'], 'ROW': np.arange(len(df))})
+    index = {
+        "rows": rows.set_index('RES_GROUP_ID').sort_index(kind='stable'),
+        "targets": by_target.set_index('RES_GROUP_ID').sort_index(kind='stable'),
+    }
+    return grouped_time, index
+
+def group_slice(frame, group):
+    """RES_GROUP_ID 인덱스로 정렬된 표에서 한 그룹 구간을 꺼내는 함수 (없는 그룹은 빈 표)"""
+    if group not in frame.index:
+        return frame.iloc[0:0].reset_index(drop=True)
+    return frame.loc[[group]].reset_index(drop=True)
+
+def create_chart(grouped, group_col, title):
+    """CAPA 항목별 비율 누적 막대 그래프 생성"""
+    colors = ['#66CC66', '#FF6666', '#FFE066', '#808080', '#F2F2F2']
+    fig = go.Figure()
+
+    # customdata[행][카테고리] = (비율, CAPA, TOTAL_CAPA) 를 배열 연산으로 한 번에 구성
+    capa = grouped[CAPA_COLUMNS].to_numpy(dtype=float)
+    percent = grouped[[f'{category}_%' for category in CAPA_COLUMNS]].to_numpy(dtype=float)
+    total = np.broadcast_to(grouped[['TOTAL_CAPA']].to_numpy(dtype=float), capa.shape)
+    customdata = np.stack([percent, capa, total], axis=2)
+
+    for i, (category, color) in enumerate(zip(CAPA_COLUMNS, colors)):
+        fig.add_trace(
+            go.Bar(
+                x=grouped[group_col],
+                y=grouped[f'{category}_%'],
+                name=category.replace('_', ' ').capitalize(),
+                marker_color=color,
+                customdata=customdata,
+                hovertemplate=(
+                    f"{category.replace('_', ' ').capitalize()}: %{{customdata[{i}][0]:.2f}}% "
+                    f"(%{{customdata[{i}][1]:,.0f}}/%{{customdata[{i}][2]:,.0f}})<extra></extra>"
+                ),
             )
+        )
 
-        # X축 스크롤링 조건 설정 (10개 초과일 경우만)
-        if len(grouped[group_col]) > 10:
-            fig.update_layout(
-                xaxis=dict(
-                    title=f"{group_col}",
-                    tickangle=45,
-                    automargin=True,
-                    range=[-0.5, 9.5],  # 처음엔 처음 10개만 보이도록 설정
-                    fixedrange=False,  # 확대/축소 가능
-                )
-            )
-        else:
-            # X축 스크롤 및 확대/축소 비활성화
-            fig.update_layout(
-                xaxis=dict(
-                    title=f"{group_col}",
-                    tickangle=45,
-                    automargin=True,
-                    fixedrange=True,  # 확대/축소 불가
-                )
+    # X축 스크롤링 조건 설정 (10개 초과일 경우만)
+    if len(grouped[group_col]) > 10:
+        fig.update_layout(
+            xaxis=dict(
+                title=f"{group_col}",
+                tickangle=45,
+                automargin=True,
+                range=[-0.5, 9.5],  # 처음엔 처음 10개만 보이도록 설정
+                fixedrange=False,  # 확대/축소 가능
             )
-
+        )
+    else:
+        # X축 스크롤 및 확대/축소 비활성화
         fig.update_layout(
-            title=title,
-            yaxis_title="백분율 (%)",
-            barmode='stack',
-            hovermode="x unified",
-            margin=dict(l=10, r=10, t=30, b=70),
+            xaxis=dict(
+                title=f"{group_col}",
+                tickangle=45,
+                automargin=True,
+                fixedrange=True,  # 확대/축소 불가
+            )
         )
-        return fig
 
-    # 데이터 처리 및 RES_GROUP_ID별 선택
-    grouped_time = process_data(df, 'RES_GROUP_ID')
+    fig.update_layout(
+        title=title,
+        yaxis_title="백분율 (%)",
+        barmode='stack',
+        hovermode="x unified",
+        margin=dict(l=10, r=10, t=30, b=70),
+    )
+    return fig
+
+AGGREGATES = {"equipment_detail.group_index": build_group_index}
+
+@st.fragment
+def show_group_detail(grouped_time, group_index):
+    """선택한 RES_GROUP_ID의 세부 그래프 (선택 변경 시 이 부분만 다시 실행)"""
+    # RES_GROUP_ID별 선택
     selected_group = st.selectbox("세부 그래프를 볼 RES_GROUP_ID를 선택하세요:", grouped_time['RES_GROUP_ID'])
 
     if selected_group:
         st.subheader(f"선택된 RES_GROUP_ID: {selected_group}")
-        df_target = df[df['RES_GROUP_ID'] == selected_group]
-
-        # TARGET_ID와 RES_MASTER 테이블 연결하여 RES_NAME + '_' + TARGET_ID 생성
-        df_target = pd.merge(df_target, res_master, left_on='TARGET_ID', right_on='RES_ID', how='left')
-        df_target['RES_NAME+RES_ID'] = df_target['RES_NAME'].fillna('Unknown') + '_' + df_target['TARGET_ID']
-
-        grouped_target = process_data(df_target, 'RES_NAME+RES_ID')
+        grouped_target = group_slice(group_index["targets"], selected_group)
         fig_target = create_chart(grouped_target, 'RES_NAME+RES_ID', f"TARGET_ID별 CAPA Distribution ({selected_group})")
         st.plotly_chart(fig_target, use_container_width=True)
 
+def show_page(uploaded_files):
+    st.title("장비 그룹별 개별 가동율 현황")
+
+    # 파일 검사
+    if "CAPA_ALLOCATION_INFO.parquet" not in uploaded_files or "RES_MASTER.parquet" not in uploaded_files:
+        st.error("CAPA_ALLOCATION_INFO.parquet와 RES_MASTER.parquet 파일이 모두 필요합니다.")
+        return
+
+    # RES_GROUP_ID별 색인은 업로드당 한 번만 생성 (그룹 변경 시에는 정렬된 인덱스에서 구간만 조회)
+    grouped_time, group_index = uploaded_files.aggregate("equipment_detail.group_index", build_group_index)
+
+    # RES_GROUP_ID 선택과 세부 그래프는 fragment로 분리 (선택 변경 시 페이지 전체를 다시 실행하지 않음)
+    show_group_detail(grouped_time, group_index)
+
 if __name__ == "__main__":
+    from utils.table_registry import TableRegistry
+
     uploaded_files = {
         "CAPA_ALLOCATION_INFO.parquet": "D:/path/to/CAPA_ALLOCATION_INFO.parquet",
         "RES_MASTER.parquet": "D:/path/to/RES_MASTER.parquet"
     }
-    show_page(uploaded_files)
+    show_page(TableRegistry(uploaded_files))
@@ -3,6 +3,63 @@ import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
 
+# TARGET_TYPE/CAPA_TYPE 조합별로 나눠 보는 RES_GROUP_ID별 CAPA
+TABLES = {
+    "CAPA_ALLOCATION_INFO.parquet": {
+        "columns": [
+            "TARGET_TYPE", "CAPA_TYPE", "RES_GROUP_ID",
+            "TOTAL_CAPA", "OFF_TIME_CAPA", "ALLOCATION_CAPA", "PM_CAPA", "SETUP_CAPA", "REMAIN_CAPA",
+        ],
+        "categorical": True,
+    },
+}
+
+# CAPA 항목 (차트의 누적 순서)
+CAPA_COLUMNS = ['ALLOCATION_CAPA', 'SETUP_CAPA', 'PM_CAPA', 'OFF_TIME_CAPA', 'REMAIN_CAPA']
+
+# 데이터가 없어도 항상 표시하는 (TARGET_TYPE, CAPA_TYPE) 조합과 차트 제목
+DEFAULT_SLICES = {
+    ('Resource', 'Time'): "RES_GROUP_ID별 CAPA Distribution (Time)",
+    ('Resource', 'Quantity'): "RES_GROUP_ID별 CAPA Distribution (Quantity)",
+    ('AddResource', 'Time'): "RES_GROUP_ID별 CAPA Distribution (AddResource + Time)",
+}
+
+def slice_title(target_type, capa_type):
+    if (target_type, capa_type) in DEFAULT_SLICES:
+        return DEFAULT_SLICES[(target_type, capa_type)]
+    return f"RES_GROUP_ID별 CAPA Distribution ({target_type} + {capa_type})"
+
+def process_data(df):
+    """(TARGET_TYPE, CAPA_TYPE, RES_GROUP_ID)별 CAPA 합계와 비율을 한 번에 계산하여 조합별로 나누는 함수"""
+    grouped = (
+        df.groupby(['TARGET_TYPE', 'CAPA_TYPE', 'RES_GROUP_ID'], observed=True)[['TOTAL_CAPA'] + CAPA_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+
+    # 비율 계산 (모든 조합을 한 번의 배열 연산으로)
+    total = grouped[['TOTAL_CAPA']].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = grouped[CAPA_COLUMNS].to_numpy(dtype=float) / total * 100
+    grouped[[f'{column}_%' for column in CAPA_COLUMNS]] = percent
+
+    # X축 레이블: RES_GROUP_ID만 표시
+    grouped['X_LABEL'] = grouped['RES_GROUP_ID']
+
+    # 조합별로 Allocation_capa 퍼센티지 기준 정렬
+    grouped = grouped.sort_values(by='ALLOCATION_CAPA_%', ascending=False, kind='stable')
+    slices = {key: pd.DataFrame() for key in DEFAULT_SLICES}
+    for key, part in grouped.groupby(['TARGET_TYPE', 'CAPA_TYPE'], sort=True, observed=True):
+        slices[key] = part.reset_index(drop=True)
+    return slices
+
+def build_slices(tables):
+    """CAPA_ALLOCATION_INFO를 읽어 (TARGET_TYPE, CAPA_TYPE) 조합별 CAPA 비율 표를 만드는 함수"""
+    df = tables.load("CAPA_ALLOCATION_INFO.parquet", **TABLES["CAPA_ALLOCATION_INFO.parquet"])
+    return process_data(df)
+
+AGGREGATES = {"group_operation_rate.slices": build_slices}
+
 def show_page(uploaded_files):
     st.title("장비 그룹별 가동율 현황")
 
@@ -11,51 +68,8 @@ def show_page(uploaded_files):
         st.error("CAPA_ALLOCATION_INFO.parquet 파일이 업로드되지 않았습니다.")
         return
 
-    # Parquet 파일 읽기
-    df = pd.read_parquet(uploaded_files["CAPA_ALLOCATION_INFO.parquet"], engine='pyarrow')
-
-    # 조건 필터링 및 그룹화 로직 (공통 함수)
-    def process_data(df_filtered):
-        if df_filtered.empty:  # 필터링된 데이터가 없는 경우
-            return pd.DataFrame()  # 빈 데이터프레임 반환
-
-        grouped = df_filtered.groupby('RES_GROUP_ID').agg({
-            'TOTAL_CAPA': 'sum',
-            'OFF_TIME_CAPA': 'sum',
-            'ALLOCATION_CAPA': 'sum',
-            'PM_CAPA': 'sum',
-            'SETUP_CAPA': 'sum',
-            'REMAIN_CAPA': 'sum'
-        }).reset_index()
-
-        if grouped.empty:  # 그룹화 결과가 빈 경우
-            return pd.DataFrame()
-
-        # 비율 계산
-        grouped['OFF_TIME_CAPA_%'] = (grouped['OFF_TIME_CAPA'] / grouped['TOTAL_CAPA']) * 100
-        grouped['ALLOCATION_CAPA_%'] = (grouped['ALLOCATION_CAPA'] / grouped['TOTAL_CAPA']) * 100
-        grouped['PM_CAPA_%'] = (grouped['PM_CAPA'] / grouped['TOTAL_CAPA']) * 100
-        grouped['SETUP_CAPA_%'] = (grouped['SETUP_CAPA'] / grouped['TOTAL_CAPA']) * 100
-        grouped['REMAIN_CAPA_%'] = (grouped['REMAIN_CAPA'] / grouped['TOTAL_CAPA']) * 100
-
-        # Allocation_capa 퍼센티지 기준으로 정렬
-        grouped = grouped.sort_values(by='ALLOCATION_CAPA_%', ascending=False)
-
-        # X축 레이블: RES_GROUP_ID만 표시
-        grouped['X_LABEL'] = grouped['RES_GROUP_ID']
-
-        # customdata 생성
-        grouped['customdata'] = grouped.apply(
-            lambda row: [
-                (row['ALLOCATION_CAPA_%'], row['ALLOCATION_CAPA'], row['TOTAL_CAPA']),
-                (row['SETUP_CAPA_%'], row['SETUP_CAPA'], row['TOTAL_CAPA']),
-                (row['PM_CAPA_%'], row['PM_CAPA'], row['TOTAL_CAPA']),
-                (row['OFF_TIME_CAPA_%'], row['OFF_TIME_CAPA'], row['TOTAL_CAPA']),
-                (row['REMAIN_CAPA_%'], row['REMAIN_CAPA'], row['TOTAL_CAPA']),
-            ],
-            axis=1
-        )
-        return grouped
+    # 조합별 CAPA 비율 표는 업로드당 한 번만 계산
+    slices = uploaded_files.aggregate("group_operation_rate.slices", build_slices)
 
     # X축 스크롤 모드 활성화 함수
     def create_chart(grouped, title):
@@ -63,19 +77,25 @@ def show_page(uploaded_files):
             st.warning(f"{title} 에 대한 데이터가 없습니다.")
             return None
 
-        categories = ['Allocation_capa', 'Setup_capa', 'Pm_capa', 'Off_time_capa', 'Remain_capa']
         colors = ['#66CC66', '#FF6666', '#FFE066', '#808080', '#F2F2F2']
         fig = go.Figure()
 
-        for i, (category, color) in enumerate(zip(categories, colors)):
+        # customdata[행][카테고리] = (비율, CAPA, TOTAL_CAPA) 를 배열 연산으로 한 번에 구성
+        capa = grouped[CAPA_COLUMNS].to_numpy(dtype=float)
+        percent = grouped[[f'{column}_%' for column in CAPA_COLUMNS]].to_numpy(dtype=float)
+        total = np.broadcast_to(grouped[['TOTAL_CAPA']].to_numpy(dtype=float), capa.shape)
+        customdata = np.stack([percent, capa, total], axis=2)
+
+        for i, (column, color) in enumerate(zip(CAPA_COLUMNS, colors)):
+            category = column.capitalize()
             fig.add_trace(
                 go.Bar(
                     x=grouped['X_LABEL'],
-                    y=grouped[f'{category.upper()}_%'],
-                    name=category.capitalize(),
+                    y=grouped[f'{column}_%'],
+                    name=category,
                     marker_color=color,
-                    customdata=np.stack(grouped['customdata'].to_numpy()),
-                    hovertemplate=(f"{category.capitalize()}: %{{customdata[{i}][0]:.2f}}% "
+                    customdata=customdata,
+                    hovertemplate=(f"{category}: %{{customdata[{i}][0]:.2f}}% "
                                 f"(%{{customdata[{i}][1]:,.0f}}/%{{customdata[{i}][2]:,.0f}})<extra></extra>"),
                 )
             )
@@ -111,28 +131,11 @@ def show_page(uploaded_files):
         return fig
 
 
-    # 데이터 필터링 및 차트 생성
-    df_time = df[(df['TARGET_TYPE'] == 'Resource') & (df['CAPA_TYPE'] == 'Time')]
-    grouped_time = process_data(df_time)
-
-    df_quantity = df[(df['TARGET_TYPE'] == 'Resource') & (df['CAPA_TYPE'] == 'Quantity')]
-    grouped_quantity = process_data(df_quantity)
-
-    df_addresource_time = df[(df['TARGET_TYPE'] == 'AddResource') & (df['CAPA_TYPE'] == 'Time')]
-    grouped_addresource_time = process_data(df_addresource_time)
-
-    # 그래프 생성 및 표시
-    fig_time = create_chart(grouped_time, "RES_GROUP_ID별 CAPA Distribution (Time)")
-    if fig_time:
-        st.plotly_chart(fig_time, use_container_width=True)
-
-    fig_quantity = create_chart(grouped_quantity, "RES_GROUP_ID별 CAPA Distribution (Quantity)")
-    if fig_quantity:
-        st.plotly_chart(fig_quantity, use_container_width=True)
-
-    fig_addresource_time = create_chart(grouped_addresource_time, "RES_GROUP_ID별 CAPA Distribution (AddResource + Time)")
-    if fig_addresource_time:
-        st.plotly_chart(fig_addresource_time, use_container_width=True)
+    # 한 번의 그룹화로 모든 (TARGET_TYPE, CAPA_TYPE) 조합 계산 후 조합별 차트 생성
+    for (target_type, capa_type), grouped in slices.items():
+        fig = create_chart(grouped, slice_title(target_type, capa_type))
+        if fig:
+            st.plotly_chart(fig, use_container_width=True)
 
 if __name__ == "__main__":
     show_page()
@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
+import pyarrow.parquet as pq
 import os
+from concurrent.futures import ThreadPoolExecutor
+from utils.parquet_diff import KEY_COLUMNS, diff_parquet_tables
 
 def find_parquet_files_in_folder(base_folder):
     """지정된 폴더에서 모든 PARQUET 파일을 재귀적으로 검색."""
@@ -11,76 +14,82 @@ def find_parquet_files_in_folder(base_folder):
                 parquet_files.append(os.path.join(root, file))
     return parquet_files
 
+def read_parquet_footer(path):
+    """Parquet 푸터 메타데이터에서 행 개수와 스키마만 읽음 (데이터는 디코딩하지 않음)"""
+    # 파일 핸들을 바로 닫아 많은 파일을 비교해도 핸들이 남지 않도록 함 (Windows에서는 폴더 잠금 방지)
+    with pq.ParquetFile(path) as parquet_file:
+        return parquet_file.metadata.num_rows, parquet_file.schema_arrow
+
+def schema_differences(schema1, schema2):
+    """두 스키마의 추가/삭제 컬럼과 타입 변경을 문자열로 정리"""
+    types1 = {field.name: field.type for field in schema1}
+    types2 = {field.name: field.type for field in schema2}
+    differences = []
+    removed = [name for name in types1 if name not in types2]
+    added = [name for name in types2 if name not in types1]
+    changed = [
+        f"{name}({types1[name]}→{types2[name]})"
+        for name in types1 if name in types2 and types1[name] != types2[name]
+    ]
+    if removed:
+        differences.append(f"삭제: {', '.join(removed)}")
+    if added:
+        differences.append(f"추가: {', '.join(added)}")
+    if changed:
+        differences.append(f"타입 변경: {', '.join(changed)}")
+    return " / ".join(differences)
+
+def compare_parquet_pair(file_name, path1, path2):
+    """같은 이름의 PARQUET 파일 한 쌍을 푸터 기준으로 비교하여 차이가 있으면 결과 행을 반환"""
+    try:
+        (row_count1, schema1), (row_count2, schema2) = read_parquet_footer(path1), read_parquet_footer(path2)
+    except Exception as e:
+        return {
+            "파일명": file_name,
+            "폴더1 행 개수": "오류",
+            "폴더2 행 개수": "오류",
+            "차이": f"Error: {e}",
+            "스키마 차이": "",
+        }
+
+    schema_diff = schema_differences(schema1, schema2)
+    if row_count1 == row_count2 and not schema_diff:
+        return None
+    return {
+        "파일명": file_name,
+        "폴더1 행 개수": row_count1,
+        "폴더2 행 개수": row_count2,
+        "차이": row_count1 - row_count2,
+        "스키마 차이": schema_diff,
+    }
+
+def compare_parquet_folders(pool, files1, files2):
+    """두 폴더의 공통 PARQUET 파일 비교 작업을 스레드 풀에 제출 (결과는 파일명 순서로 반환)"""
+    files1_dict = {os.path.basename(file): file for file in files1}
+    files2_dict = {os.path.basename(file): file for file in files2}
+    common_files = sorted(set(files1_dict).intersection(files2_dict))
+
+    return pool.map(
+        lambda file_name: compare_parquet_pair(file_name, files1_dict[file_name], files2_dict[file_name]),
+        common_files,
+    )
+
 def compare_parquet_files_in_subfolders(folder1, folder2):
     """Data와 Experiment 1 하위 폴더에서 PARQUET 파일 비교."""
-    data_folder1 = os.path.join(folder1, 'Data')
-    data_folder2 = os.path.join(folder2, 'Data')
-    experiment_folder1 = os.path.join(folder1, 'Experiment 1')
-    experiment_folder2 = os.path.join(folder2, 'Experiment 1')
-
-    # 각 폴더에서 파일 검색
-    data_files1 = find_parquet_files_in_folder(data_folder1)
-    data_files2 = find_parquet_files_in_folder(data_folder2)
-    experiment_files1 = find_parquet_files_in_folder(experiment_folder1)
-    experiment_files2 = find_parquet_files_in_folder(experiment_folder2)
-
-    # 파일 이름별로 매칭하기 위해 딕셔너리 생성
-    data_files1_dict = {os.path.basename(file): file for file in data_files1}
-    data_files2_dict = {os.path.basename(file): file for file in data_files2}
-    experiment_files1_dict = {os.path.basename(file): file for file in experiment_files1}
-    experiment_files2_dict = {os.path.basename(file): file for file in experiment_files2}
-
-    # Data 폴더 비교
-    data_common_files = set(data_files1_dict.keys()).intersection(data_files2_dict.keys())
-    data_differences = []
-    for file_name in data_common_files:
-        try:
-            df1 = pd.read_parquet(data_files1_dict[file_name], engine="pyarrow")
-            df2 = pd.read_parquet(data_files2_dict[file_name], engine="pyarrow")
-
-            row_count1 = len(df1)
-            row_count2 = len(df2)
-
-            if row_count1 != row_count2:
-                data_differences.append({
-                    "파일명": file_name,
-                    "폴더1 행 개수": row_count1,
-                    "폴더2 행 개수": row_count2,
-                    "차이": row_count1 - row_count2
-                })
-        except Exception as e:
-            data_differences.append({
-                "파일명": file_name,
-                "폴더1 행 개수": "오류",
-                "폴더2 행 개수": "오류",
-                "차이": f"Error: {e}"
-            })
-
-    # Experiment 1 폴더 비교
-    experiment_common_files = set(experiment_files1_dict.keys()).intersection(experiment_files2_dict.keys())
-    experiment_differences = []
-    for file_name in experiment_common_files:
-        try:
-            df1 = pd.read_parquet(experiment_files1_dict[file_name], engine="pyarrow")
-            df2 = pd.read_parquet(experiment_files2_dict[file_name], engine="pyarrow")
-
-            row_count1 = len(df1)
-            row_count2 = len(df2)
-
-            if row_count1 != row_count2:
-                experiment_differences.append({
-                    "파일명": file_name,
-                    "폴더1 행 개수": row_count1,
-                    "폴더2 행 개수": row_count2,
-                    "차이": row_count1 - row_count2
-                })
-        except Exception as e:
-            experiment_differences.append({
-                "파일명": file_name,
-                "폴더1 행 개수": "오류",
-                "폴더2 행 개수": "오류",
-                "차이": f"Error: {e}"
-            })
+    subfolders = ['Data', 'Experiment 1']
+
+    # 파일 쌍은 푸터만 읽으므로 I/O 대기가 대부분이라 두 하위 폴더의 모든 쌍을 스레드 풀에 한 번에 제출
+    with ThreadPoolExecutor() as pool:
+        data_results, experiment_results = [
+            compare_parquet_folders(
+                pool,
+                find_parquet_files_in_folder(os.path.join(folder1, subfolder)),
+                find_parquet_files_in_folder(os.path.join(folder2, subfolder)),
+            )
+            for subfolder in subfolders
+        ]
+        data_differences = [result for result in data_results if result is not None]
+        experiment_differences = [result for result in experiment_results if result is not None]
 
     # 차이가 있는 파일 개수 계산
     data_diff_count = len(data_differences)
@@ -88,6 +97,52 @@ def compare_parquet_files_in_subfolders(folder1, folder2):
 
     return pd.DataFrame(data_differences), pd.DataFrame(experiment_differences), data_diff_count, experiment_diff_count
 
+def find_common_parquet_files(folder1, folder2):
+    """Data와 Experiment 1 하위 폴더에서 두 경로에 모두 있는 PARQUET 파일을 {하위 폴더/파일명: (경로1, 경로2)}로 반환"""
+    common_files = {}
+    for subfolder in ['Data', 'Experiment 1']:
+        files1 = {os.path.basename(file): file for file in find_parquet_files_in_folder(os.path.join(folder1, subfolder))}
+        files2 = {os.path.basename(file): file for file in find_parquet_files_in_folder(os.path.join(folder2, subfolder))}
+        for file_name in sorted(set(files1).intersection(files2)):
+            common_files[f"{subfolder}/{file_name}"] = (files1[file_name], files2[file_name])
+    return common_files
+
+@st.fragment
+def show_row_diff(folder1, folder2):
+    """선택한 PARQUET 파일을 키 기준으로 행 단위 비교 (파일/키 선택 시 이 부분만 다시 실행)"""
+    st.subheader("PARQUET 파일 행 단위 비교")
+    common_files = find_common_parquet_files(folder1, folder2)
+    if not common_files:
+        st.info("두 경로에 공통으로 있는 PARQUET 파일이 없습니다.")
+        return
+
+    file_label = st.selectbox("비교할 PARQUET 파일을 선택하세요", list(common_files))
+    path1, path2 = common_files[file_label]
+    names2 = read_parquet_footer(path2)[1].names
+    columns = [name for name in read_parquet_footer(path1)[1].names if name in names2]
+    default_keys = [column for column in KEY_COLUMNS.get(os.path.basename(file_label), []) if column in columns]
+    key_columns = st.multiselect("비교 키 컬럼을 선택하세요", columns, default=default_keys)
+
+    if st.button("행 단위 비교 시작"):
+        if not key_columns:
+            st.error("비교 키 컬럼을 하나 이상 선택하세요.")
+            return
+
+        with st.spinner("행 단위 비교 중..."):
+            result = diff_parquet_tables(path1, path2, key_columns)
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("추가된 행", f"{result['added']:,}")
+        col2.metric("삭제된 행", f"{result['removed']:,}")
+        col3.metric("변경된 행", f"{result['changed']:,}")
+        col4.metric("동일한 행", f"{result['unchanged']:,}")
+
+        st.write("컬럼별 변경 행 수")
+        st.dataframe(result["column_changes"], use_container_width=True)
+
+        st.write("차이가 있는 행 샘플 (상태별 최대 일부 키)")
+        st.dataframe(result["samples"], use_container_width=True)
+
 def show_page():
     st.title("ISU 결과 분석")
 
@@ -118,5 +173,9 @@ def show_page():
             st.dataframe(experiment_diff, use_container_width=True)
             st.write(f"Experiment 1 폴더에서 차이가 있는 파일 개수: {experiment_diff_count}")
 
+    # 키 기준 행 단위 비교
+    if folder1 and folder2 and folder1 != folder2:
+        show_row_diff(folder1, folder2)
+
 if __name__ == "__main__":
     show_page()
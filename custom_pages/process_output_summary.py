@@ -3,83 +3,82 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-
-def show_page(found_files):
-    st.title("공정별 생산량 분석")
-
-    # RES_PLAN.parquet 파일 확인
-    if "RES_PLAN.parquet" not in found_files:
-        st.error("RES_PLAN.parquet 파일이 필요합니다.")
-        return
-
-    # RES_PLAN.parquet 파일 읽기
-    file_path = found_files["RES_PLAN.parquet"]
-    df = pd.read_parquet(file_path, engine="pyarrow")
-
-    # MAIN_RES_ID와 RES_ID가 같은 행만 필터링
-    df = df[df['MAIN_RES_ID'] == df['RES_ID']]
-
-    # 필터링 조건 적용
-    filtered_df = df[
-        (df['ALLOCATION_TYPE'] == 'Allocate') & 
-        (df['OPER_ID'].notnull())
-    ]
-
-    # PLAN_DATE를 datetime 형식으로 변환
-    filtered_df['PLAN_DATE'] = pd.to_datetime(filtered_df['PLAN_DATE'])
-
-    # OPER_ID 선택 박스 생성 (페이지 내부)
-    unique_oper_ids = filtered_df['OPER_ID'].unique()
-    selected_oper_id = st.selectbox("OPER_ID를 선택하세요", unique_oper_ids)
-
-    # 선택한 OPER_ID로 필터링
-    filtered_df = filtered_df[filtered_df['OPER_ID'] == selected_oper_id]
-
-    # 일별 그룹화 - PLAN_DATE에 있는 날짜만 사용
-    daily_df = filtered_df.groupby(['PLAN_DATE'], as_index=False)['PLAN_QTY'].sum()
-    daily_df['CUM_PLAN_QTY'] = daily_df['PLAN_QTY'].cumsum()  # 누적 생산량 계산
-    daily_df['OPER_ID'] = selected_oper_id
-    daily_df = daily_df[['PLAN_DATE', 'OPER_ID', 'PLAN_QTY', 'CUM_PLAN_QTY']]  # 컬럼 순서 조정
-
-    # 주별 그룹화 (yyyy-mm 형식으로 포맷)
-    filtered_df['WEEK'] = filtered_df['PLAN_DATE'].dt.to_period('W').astype(str)
-    weekly_df = filtered_df.groupby(['WEEK'], as_index=False)['PLAN_QTY'].sum()
-    weekly_df['CUM_PLAN_QTY'] = weekly_df['PLAN_QTY'].cumsum()  # 누적 생산량 계산
-
-    # 월별 그룹화 (yyyy-mm 형식)
-    filtered_df['MONTH'] = filtered_df['PLAN_DATE'].dt.to_period('M').astype(str)
-    monthly_df = filtered_df.groupby(['MONTH'], as_index=False)['PLAN_QTY'].sum()
-    monthly_df['CUM_PLAN_QTY'] = monthly_df['PLAN_QTY'].cumsum()  # 누적 생산량 계산
-
-    # 결과 표시
-    st.subheader(f"선택된 OPER_ID: {selected_oper_id}")
-    st.subheader("일별 생산량")
-    st.dataframe(daily_df)
-
-    # 시각화: 일별 그래프 (누적 그래프 포함)
-    st.subheader("일별 생산량 그래프")
-    fig_daily = go.Figure()
-
-    # 막대그래프 (PLAN_QTY)
-    fig_daily.add_trace(go.Bar(
-        x=daily_df['PLAN_DATE'],
-        y=daily_df['PLAN_QTY'],
-        name="일별 생산량",
-        yaxis='y1'
-    ))
-
-    # 선그래프 (CUM_PLAN_QTY)
-    fig_daily.add_trace(go.Scatter(
-        x=daily_df['PLAN_DATE'],
-        y=daily_df['CUM_PLAN_QTY'],
-        mode='lines+markers',
-        name="누적 생산량",
-        line=dict(color='red'),
-        yaxis='y2'
-    ))
+from utils.time_rollup import time_rollup
+
+# Allocate 계획만 공정별 생산량으로 집계
+TABLES = {
+    "RES_PLAN.parquet": {
+        "columns": ["MAIN_RES_ID", "RES_ID", "ALLOCATION_TYPE", "OPER_ID", "PLAN_DATE", "PLAN_QTY"],
+        "filters": [("ALLOCATION_TYPE", "==", "Allocate")],
+    },
+}
+
+# 공정별 생산량 큐브의 주기별 컬럼명과 그래프 제목
+PERIODS = {
+    "daily": ("PLAN_DATE", "일별"),
+    "weekly": ("WEEK", "주별"),
+    "monthly": ("MONTH", "월별"),
+}
+
+def build_oper_cube(tables):
+    """OPER_ID별 일/주/월 생산량과 누적 생산량 큐브를 업로드당 한 번 계산하는 함수
+
+    반환값: (OPER_ID 목록, {주기: OPER_ID 인덱스로 정렬된 DataFrame})
+    """
+    df = tables.load("RES_PLAN.parquet", **TABLES["RES_PLAN.parquet"])
+
+    # MAIN_RES_ID와 RES_ID가 같고 OPER_ID가 있는 행만 사용
+    df = df[(df['MAIN_RES_ID'] == df['RES_ID']) & df['OPER_ID'].notnull()]
+    oper_ids = list(df['OPER_ID'].unique())
+
+    # 모든 OPER_ID의 일/주/월별 생산량과 누적 생산량을 한 번에 계산 (주는 월요일, 월은 1일 시작 날짜)
+    rollup = time_rollup(df, 'PLAN_DATE', 'PLAN_QTY', by=['OPER_ID'])
+
+    # 주기별로 긴 표 하나만 보관 (OPER_ID 인덱스로 정렬해 두고 화면에서 선택한 공정만 .loc으로 꺼냄)
+    cube = {}
+    for freq, (period_col, _) in PERIODS.items():
+        frame = rollup[freq].rename(columns={'PERIOD_START': period_col})
+        frame = frame[[period_col, 'OPER_ID', 'PLAN_QTY', 'CUM_PLAN_QTY']]
+        cube[freq] = frame.set_index('OPER_ID').sort_index(kind='stable')
+    return oper_ids, cube
+
+def oper_slice(cube, freq, oper_id):
+    """큐브에서 한 OPER_ID의 주기별 생산량 표를 꺼내는 함수"""
+    period_col = PERIODS[freq][0]
+    data = cube[freq].loc[[oper_id]].reset_index()
+    return data[[period_col, 'OPER_ID', 'PLAN_QTY', 'CUM_PLAN_QTY']]
+
+AGGREGATES = {"process_output_summary.oper_cube": build_oper_cube}
+
+def create_chart(slices, period_col, label, xaxis=None):
+    """선택한 OPER_ID별 생산량(막대)과 누적 생산량(선) 그래프 생성"""
+    fig = go.Figure()
+    compare = len(slices) > 1
+
+    for oper_id, data in slices.items():
+        prefix = f"{oper_id} " if compare else ""
+
+        # 막대그래프 (PLAN_QTY)
+        fig.add_trace(go.Bar(
+            x=data[period_col],
+            y=data['PLAN_QTY'],
+            name=f"{prefix}{label} 생산량",
+            yaxis='y1'
+        ))
+
+        # 선그래프 (CUM_PLAN_QTY), 여러 공정 비교 시에는 공정별 기본 색상 사용
+        fig.add_trace(go.Scatter(
+            x=data[period_col],
+            y=data['CUM_PLAN_QTY'],
+            mode='lines+markers',
+            name=f"{prefix}누적 생산량",
+            line=None if compare else dict(color='red'),
+            yaxis='y2'
+        ))
 
     # 레이아웃 설정
-    fig_daily.update_layout(
+    fig.update_layout(
+        barmode='group',
         yaxis=dict(
             title="생산량",
             side="left",
@@ -93,99 +92,68 @@ def show_page(found_files):
             tickformat=".0s",  # k 단위로 표시, 소수점 제거
             dtick=100000  # 100k 단위 설정
         ),
-        xaxis=dict(
-            tickmode='linear',
-            dtick=86400000.0,  # 하루 단위(ms 기준)
-            tickformat="%Y-%m-%d",
-            range=[daily_df['PLAN_DATE'].iloc[0], daily_df['PLAN_DATE'].iloc[19]] if len(daily_df['PLAN_DATE']) > 20 else None,
-            fixedrange=False
-        ),
         legend=dict(x=0, y=1.1)
     )
+    if xaxis is not None:
+        fig.update_layout(xaxis=xaxis)
+    return fig
+
+@st.fragment
+def show_oper_comparison(oper_ids, cube):
+    """선택한 OPER_ID의 생산량 표와 그래프 (선택 변경 시 이 부분만 다시 실행)"""
+    # OPER_ID 선택 (여러 개를 선택하면 공정별로 비교)
+    selected_oper_ids = st.multiselect("OPER_ID를 선택하세요", oper_ids, default=oper_ids[:1])
+    if not selected_oper_ids:
+        st.info("OPER_ID를 하나 이상 선택하세요.")
+        return
 
-    st.plotly_chart(fig_daily, use_container_width=True)
-
-    # 시각화: 주별 그래프 (누적 그래프 포함)
-    st.subheader("주별 생산량 그래프")
-    fig_weekly = go.Figure()
-
-    # 막대그래프 (PLAN_QTY)
-    fig_weekly.add_trace(go.Bar(
-        x=weekly_df['WEEK'],
-        y=weekly_df['PLAN_QTY'],
-        name="주별 생산량",
-        yaxis='y1'
-    ))
-
-    # 선그래프 (CUM_PLAN_QTY)
-    fig_weekly.add_trace(go.Scatter(
-        x=weekly_df['WEEK'],
-        y=weekly_df['CUM_PLAN_QTY'],
-        mode='lines+markers',
-        name="누적 생산량",
-        line=dict(color='red'),
-        yaxis='y2'
-    ))
+    slices = {freq: {oper_id: oper_slice(cube, freq, oper_id) for oper_id in selected_oper_ids} for freq in PERIODS}
 
-    # 레이아웃 설정
-    fig_weekly.update_layout(
-        yaxis=dict(
-            title="생산량",
-            side="left",
-            tickformat=".0f",  # 천 단위 콤마 표시 및 소수점 제거
-        ),
-        yaxis2=dict(
-            title="누적 생산량",
-            overlaying='y',
-            side="right",
-            showgrid=False,
-            tickformat=".0s",  # k 단위로 표시, 소수점 제거
-            dtick=100000  # 100k 단위 설정
-        ),
-        legend=dict(x=0, y=1.1)
-    )
-    st.plotly_chart(fig_weekly, use_container_width=True)
-
-    # 시각화: 월별 그래프 (누적 그래프 포함)
-    st.subheader("월별 생산량 그래프")
-    fig_monthly = go.Figure()
-
-    # 막대그래프 (PLAN_QTY)
-    fig_monthly.add_trace(go.Bar(
-        x=monthly_df['MONTH'],
-        y=monthly_df['PLAN_QTY'],
-        name="월별 생산량",
-        yaxis='y1'
-    ))
-
-    # 선그래프 (CUM_PLAN_QTY)
-    fig_monthly.add_trace(go.Scatter(
-        x=monthly_df['MONTH'],
-        y=monthly_df['CUM_PLAN_QTY'],
-        mode='lines+markers',
-        name="누적 생산량",
-        line=dict(color='red'),
-        yaxis='y2'
-    ))
+    # 결과 표시
+    st.subheader(f"선택된 OPER_ID: {', '.join(map(str, selected_oper_ids))}")
+    st.subheader("일별 생산량")
+    daily_df = pd.concat(slices['daily'].values(), ignore_index=True)
+    st.dataframe(daily_df)
 
-    # 레이아웃 설정
-    fig_monthly.update_layout(
-        yaxis=dict(
-            title="생산량",
-            side="left",
-            tickformat=".0f",  # 천 단위 콤마 표시 및 소수점 제거
-        ),
-        yaxis2=dict(
-            title="누적 생산량",
-            overlaying='y',
-            side="right",
-            showgrid=False,
-            tickformat=".0s",  # k 단위로 표시, 소수점 제거
-            dtick=100000  # 100k 단위 설정
-        ),
-        legend=dict(x=0, y=1.1)
+    # 일별 그래프는 처음 20일 구간을 기본으로 표시
+    plan_dates = np.unique(daily_df['PLAN_DATE'].to_numpy())
+    daily_xaxis = dict(
+        tickmode='linear',
+        dtick=86400000.0,  # 하루 단위(ms 기준)
+        tickformat="%Y-%m-%d",
+        range=[plan_dates[0], plan_dates[19]] if len(plan_dates) > 20 else None,
+        fixedrange=False
     )
-    st.plotly_chart(fig_monthly, use_container_width=True)
+    xaxes = {
+        "daily": daily_xaxis,
+        "weekly": None,
+        "monthly": dict(tickformat="%Y-%m", dtick="M1"),  # yyyy-mm 형식
+    }
+
+    # 시각화: 일/주/월별 그래프 (누적 그래프 포함)
+    for freq, (period_col, label) in PERIODS.items():
+        st.subheader(f"{label} 생산량 그래프")
+        fig = create_chart(slices[freq], period_col, label, xaxes[freq])
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_page(found_files):
+    st.title("공정별 생산량 분석")
+
+    # RES_PLAN.parquet 파일 확인
+    if "RES_PLAN.parquet" not in found_files:
+        st.error("RES_PLAN.parquet 파일이 필요합니다.")
+        return
+
+    # 공정별 생산량 큐브 (업로드당 한 번만 계산, 이후에는 선택한 OPER_ID만 꺼내 사용)
+    oper_ids, cube = found_files.aggregate("process_output_summary.oper_cube", build_oper_cube)
+    if not oper_ids:
+        st.warning("표시할 OPER_ID가 없습니다.")
+        return
+
+    # OPER_ID 선택과 그래프는 fragment로 분리 (선택 변경 시 페이지 전체를 다시 실행하지 않음)
+    show_oper_comparison(oper_ids, cube)
 
 if __name__ == "__main__":
-    show_page({"RES_PLAN.parquet": "path/to/RES_PLAN.parquet"})
+    from utils.table_registry import TableRegistry
+
+    show_page(TableRegistry({"RES_PLAN.parquet": "path/to/RES_PLAN.parquet"}))
@@ -1,5 +1,43 @@
 import streamlit as st
-import pandas as pd
+
+# Setup 행의 FROM_ITEM_ID는 같은 설비의 다음 Allocate 행에서 구하므로 두 유형을 함께 읽음
+TABLES = {
+    "RES_PLAN.parquet": {
+        "columns": ["RES_GROUP_ID", "RES_ID", "PLAN_DATE", "START_DATETIME", "ALLOCATION_TYPE", "ITEM_ID"],
+        "filters": [("ALLOCATION_TYPE", "in", ["Allocate", "Setup"])],
+    },
+}
+
+def build_setup_counts(tables):
+    """Setup 직전 제품(FROM_ITEM_ID)별 Setup 횟수를 계산하는 함수 (Allocate/Setup 행이 없으면 None)"""
+    res = tables.load("RES_PLAN.parquet", **TABLES["RES_PLAN.parquet"])
+
+    # ALLOCATION_TYPE 필터링
+    filtered_res = res[res['ALLOCATION_TYPE'].isin(["Allocate", "Setup"])]
+    if filtered_res.empty:
+        return None
+
+    # 설비/날짜별 START_DATETIME 순으로 한 번에 정렬한 뒤,
+    # Setup 행의 FROM_ITEM_ID는 같은 그룹에서 바로 다음 행의 ITEM_ID (그룹의 마지막 행이면 없음)
+    sorted_res = filtered_res.sort_values(
+        ["RES_GROUP_ID", "RES_ID", "PLAN_DATE", "START_DATETIME"], kind="stable"
+    )
+    sorted_res["FROM_ITEM_ID"] = (
+        sorted_res.groupby(["RES_GROUP_ID", "RES_ID", "PLAN_DATE"], sort=False)["ITEM_ID"].shift(-1)
+    )
+    result_res = sorted_res[sorted_res["ALLOCATION_TYPE"] == "Setup"]
+
+    # 필요한 컬럼만 선택
+    final_table = result_res[["RES_GROUP_ID", "RES_ID", "PLAN_DATE", "FROM_ITEM_ID"]]
+
+    # 그룹화하여 COUNT 계산
+    return (
+        final_table.groupby(["RES_GROUP_ID", "RES_ID", "PLAN_DATE", "FROM_ITEM_ID"])
+        .size()
+        .reset_index(name="COUNT")
+    )
+
+AGGREGATES = {"setup_count_by_product.counts": build_setup_counts}
 
 def show_page(uploaded_files):
     st.title("제품별 Setup 횟수")
@@ -9,43 +47,12 @@ def show_page(uploaded_files):
         return
 
     try:
-        # 데이터 로드
-        res = pd.read_parquet(uploaded_files["RES_PLAN.parquet"], engine="pyarrow")
-
-        # ALLOCATION_TYPE 필터링
-        filtered_res = res[res['ALLOCATION_TYPE'].isin(["Allocate", "Setup"])]
-        if filtered_res.empty:
+        # Setup 횟수는 업로드당 한 번만 계산
+        grouped_count = uploaded_files.aggregate("setup_count_by_product.counts", build_setup_counts)
+        if grouped_count is None:
             st.warning("필터링된 데이터가 없습니다.")
             return
 
-        # 그룹화 및 정렬
-        grouped_res = (
-            filtered_res.groupby(["RES_GROUP_ID", "RES_ID", "PLAN_DATE"])
-            .apply(lambda x: x.sort_values(by="START_DATETIME"))
-            .reset_index(drop=True)
-        )
-
-        # FROM_ITEM_ID 생성 로직
-        def assign_from_item_id(df):
-            df["FROM_ITEM_ID"] = None
-            if not df.empty:
-                for idx in df.index[:-1]:  # 마지막 줄 제외
-                    if df.loc[idx, "ALLOCATION_TYPE"] == "Setup":
-                        df.loc[idx, "FROM_ITEM_ID"] = df.loc[idx + 1, "ITEM_ID"]
-            return df[df["ALLOCATION_TYPE"] == "Setup"]
-
-        result_res = grouped_res.groupby(["RES_GROUP_ID", "RES_ID", "PLAN_DATE"]).apply(assign_from_item_id).reset_index(drop=True)
-
-        # 필요한 컬럼만 선택
-        final_table = result_res[["RES_GROUP_ID", "RES_ID", "PLAN_DATE", "FROM_ITEM_ID"]]
-
-        # 그룹화하여 COUNT 계산
-        grouped_count = (
-            final_table.groupby(["RES_GROUP_ID", "RES_ID", "PLAN_DATE", "FROM_ITEM_ID"])
-            .size()
-            .reset_index(name="COUNT")
-        )
-
         # COUNT가 2 이상인 데이터 필터링
         filtered_table = grouped_count[grouped_count["COUNT"] >= 2]
 
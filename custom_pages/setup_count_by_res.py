@@ -3,7 +3,16 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def process_factory_config(con, total_shift_count):
+# FACTORY_CONFIG로 교대를 나누고, RES_PLAN은 Setup 행만 사용
+TABLES = {
+    "FACTORY_CONFIG.parquet": {"columns": ["FACTORY_START_TIME", "SHIFT_NAME"]},
+    "RES_PLAN.parquet": {
+        "columns": ["RES_GROUP_ID", "RES_ID", "PLAN_DATE", "ALLOCATION_TYPE", "RES_END_DATETIME"],
+        "filters": [("ALLOCATION_TYPE", "==", "Setup")],
+    },
+}
+
+def process_factory_config(con):
     # FACTORY_START_TIME을 datetime 형식으로 변환
     con['FACTORY_START_TIME'] = pd.to_datetime(con['FACTORY_START_TIME'], format='%H:%M:%S', errors='coerce').dt.time
 
@@ -11,37 +20,73 @@ def process_factory_config(con, total_shift_count):
     con['SHIFT_NAME'] = con['SHIFT_NAME'].astype(str).str.replace(" ", "").str.split(",")
     con['SHIFT_COUNT'] = con['SHIFT_NAME'].apply(len)
 
-    # 24 / total_shift_count 계산
-    shift_duration = 24 / total_shift_count  # 시간 단위
-    shift_duration_timedelta = timedelta(hours=shift_duration)
+    # 24 / SHIFT_COUNT 계산 (첫 번째 교대가 끝나는 시각)
+    con['CALCULATED_TIME'] = [
+        (datetime.combine(datetime.today(), start) + timedelta(hours=24 / count)).time()
+        if pd.notnull(start) else None
+        for start, count in zip(con['FACTORY_START_TIME'], con['SHIFT_COUNT'])
+    ]
+    return con
 
-    # CALCULATED_TIME 생성
-    con['CALCULATED_TIME'] = con['FACTORY_START_TIME'].apply(
-        lambda x: (datetime.combine(datetime.today(), x) + shift_duration_timedelta).time()
-        if pd.notnull(x) else None
+def assign_shift(end_datetime, factory_start_time, shift_names):
+    """FACTORY_START_TIME부터 하루를 교대 수만큼 균등 분할하여 각 시각의 SHIFT_NAME을 구하는 함수
+
+    교대 구간은 (교대 시작, 교대 끝]이며 자정을 넘는 구간도 그대로 처리한다.
+    """
+    shift = pd.Series(None, index=end_datetime.index, dtype=object)
+    if factory_start_time is None or pd.isnull(factory_start_time) or not shift_names:
+        return shift
+
+    # FACTORY_START_TIME 기준 경과 시간(ns)을 교대 길이로 나눠 교대 번호 계산
+    day_ns = 24 * 60 * 60 * 10**9
+    shift_ns = day_ns // len(shift_names)
+    start_ns = (
+        (factory_start_time.hour * 3600 + factory_start_time.minute * 60 + factory_start_time.second) * 10**9
+        + factory_start_time.microsecond * 1000
     )
-    return con
+    end_datetime = pd.to_datetime(end_datetime)
+    end_ns = end_datetime.to_numpy(dtype="datetime64[ns]").view("int64")
+    offset = (end_ns - start_ns) % day_ns
+    shift_index = (-(-offset // shift_ns) - 1) % len(shift_names)
+
+    valid = end_datetime.notna().to_numpy()
+    shift[valid] = np.asarray(shift_names, dtype=object)[shift_index[valid]]
+    return shift
 
-def process_res_plan(res, factory_start_time, calculated_time):
+def process_res_plan(res, factory_start_time, shift_names):
     # RES_PLAN에서 ALLOCATION_TYPE이 'Setup'인 데이터만 필터링
     res_filtered = res[res['ALLOCATION_TYPE'] == 'Setup']
 
     # SHIFT 컬럼 추가
-    def determine_shift(res_end_datetime):
-        if factory_start_time and calculated_time:
-            if factory_start_time < res_end_datetime.time() <= calculated_time:
-                return "주간"
-            elif res_end_datetime.time() > calculated_time or res_end_datetime.time() <= factory_start_time:
-                return "야간"
-        return None
-
-    res_filtered['SHIFT'] = res_filtered['RES_END_DATETIME'].apply(determine_shift)
+    res_filtered['SHIFT'] = assign_shift(res_filtered['RES_END_DATETIME'], factory_start_time, shift_names)
 
     # PLAN_DATE와 SHIFT 추가 그룹화
     grouped_with_plan_date = res_filtered.groupby(['RES_GROUP_ID', 'RES_ID', 'PLAN_DATE', 'SHIFT']).size().reset_index(name='COUNT')
 
     return grouped_with_plan_date
 
+def build_setup_counts(tables):
+    """FACTORY_CONFIG 교대 정보와 (RES_GROUP_ID, RES_ID, PLAN_DATE, SHIFT)별 Setup 횟수를 계산하는 함수"""
+    con = tables.load("FACTORY_CONFIG.parquet", **TABLES["FACTORY_CONFIG.parquet"])
+    res = tables.load("RES_PLAN.parquet", **TABLES["RES_PLAN.parquet"])
+
+    # FACTORY_CONFIG 처리 (교대 수는 SHIFT_NAME 개수로 결정)
+    con = process_factory_config(con)
+
+    # FACTORY_START_TIME, SHIFT_NAME, CALCULATED_TIME 추출
+    factory_start_time = con['FACTORY_START_TIME'].iloc[0] if not con.empty else None
+    shift_names = con['SHIFT_NAME'].iloc[0] if not con.empty else []
+    calculated_time = con['CALCULATED_TIME'].iloc[0] if not con.empty else None
+
+    return {
+        "factory_start_time": factory_start_time,
+        "shift_names": shift_names,
+        "calculated_time": calculated_time,
+        "counts": process_res_plan(res, factory_start_time, shift_names),
+    }
+
+AGGREGATES = {"setup_count_by_res.counts": build_setup_counts}
+
 def show_page(uploaded_files):
     st.title("설비별 Setup 횟수")
 
@@ -50,34 +95,28 @@ def show_page(uploaded_files):
         st.error("FACTORY_CONFIG.parquet와 RES_PLAN.parquet 파일이 모두 필요합니다.")
         return
 
-    # Parquet 파일 읽기
-    con = pd.read_parquet(uploaded_files["FACTORY_CONFIG.parquet"], engine='pyarrow')
-    res = pd.read_parquet(uploaded_files["RES_PLAN.parquet"], engine='pyarrow')
-
-    # FACTORY_CONFIG 처리
-    total_shift_count = 2  # 이 값은 동적으로 계산하거나 설정할 수 있습니다.
-    con = process_factory_config(con, total_shift_count)
-
-    # FACTORY_START_TIME과 CALCULATED_TIME 추출
-    factory_start_time = con['FACTORY_START_TIME'].iloc[0] if not con.empty else None
-    calculated_time = con['CALCULATED_TIME'].iloc[0] if not con.empty else None
+    # 교대 정보와 Setup 횟수는 업로드당 한 번만 계산
+    setup_counts = uploaded_files.aggregate("setup_count_by_res.counts", build_setup_counts)
+    factory_start_time = setup_counts["factory_start_time"]
+    shift_names = setup_counts["shift_names"]
+    calculated_time = setup_counts["calculated_time"]
 
     # FACTORY_START_TIME과 CALCULATED_TIME 표시
     st.subheader("Factory Config 시간 정보")
     st.write(f"FACTORY_START_TIME: {factory_start_time}")
+    st.write(f"SHIFT_NAME: {', '.join(shift_names)} ({len(shift_names)}교대)")
     st.write(f"CALCULATED_TIME: {calculated_time}")
 
-    # RES_PLAN 처리
-    grouped_with_plan_date = process_res_plan(res, factory_start_time, calculated_time)
-
     # PLAN_DATE와 SHIFT 추가 그룹화된 결과 표시
     st.subheader("PLAN_DATE 기준 그룹화 결과")
-    st.dataframe(grouped_with_plan_date)
+    st.dataframe(setup_counts["counts"])
 
 if __name__ == "__main__":
+    from utils.table_registry import TableRegistry
+
     # 테스트용 경로를 여기에 추가하세요
     uploaded_files = {
         "FACTORY_CONFIG.parquet": "path/to/FACTORY_CONFIG.parquet",
         "RES_PLAN.parquet": "path/to/RES_PLAN.parquet"
     }
-    show_page(uploaded_files)
+    show_page(TableRegistry(uploaded_files))
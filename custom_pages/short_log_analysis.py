@@ -3,26 +3,64 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.express as px
 
-def show_page(uploaded_files):
-    st.title("SHORT LOG 분석")
-
-    # SHORT_LOG.parquet 파일 확인 및 읽기
-    if "SHORT_LOG.parquet" not in uploaded_files:
-        st.error("SHORT_LOG.parquet 파일이 필요합니다.")
-        return
-    short_log = pd.read_parquet(uploaded_files["SHORT_LOG.parquet"], engine="pyarrow")
-
-    # SHIPMENT_PLAN.parquet 파일 확인 및 읽기
-    if "SHIPMENT_PLAN.parquet" not in uploaded_files:
-        st.error("SHIPMENT_PLAN.parquet 파일이 필요합니다.")
-        return
-    shipment_plan = pd.read_parquet(uploaded_files["SHIPMENT_PLAN.parquet"], engine="pyarrow")
+# 수요별 SHORT 사유와 출하 수량을 DEMAND에 결합
+TABLES = {
+    "SHORT_LOG.parquet": {"columns": ["DEMAND_ID", "DEMAND_ITEM_ID", "OPER_ID", "SHORT_REASON"]},
+    "SHIPMENT_PLAN.parquet": {"columns": ["DEMAND_ID", "ON_TIME_QTY", "LATE_QTY"]},
+    # DEMAND는 결과 표에 전체 컬럼을 보여주므로 그대로 읽음
+    "DEMAND.parquet": {},
+}
+
+# SHORT_REASON별 REASON 문구 (위에서부터 우선 적용, {oper}는 SHORT_LOG에서 해당 DEMAND_ID의 첫 OPER_ID)
+# 새 SHORT_REASON은 이 표에 한 줄 추가하면 됨 (추가 스캔 없음)
+REASON_RULES = [
+    ("NoOpResourceInfo", "{oper} 공정에서 사용 할 수 있는 설비가 없음"),
+    ("NoBwBomPathShort", "투입까지 전개할 수 있는 BOM 정보가 없음"),
+    ("LackOfResourceCapacity", "{oper} 공정에서 사용할 수 있는 설비 Capa가 부족"),
+    ("RemainingLots", "계획 생성 기간 내에 생산하지 못한 잔여 수량임. (계획 생성 기간을 늘릴 경우 생산할 수 있는 가능성이 있음.)"),
+]
+
+def classify_short_reason(merged_df, short_log):
+    """REASON_RULES 우선순위에 따라 SHORT_QTY > 0인 행의 REASON을 계산하는 함수"""
+    # (DEMAND_ID, SHORT_REASON)별 첫 OPER_ID 조회 테이블 (SHORT_LOG 행 순서 유지)
+    first_oper = short_log[["DEMAND_ID", "SHORT_REASON", "OPER_ID"]].drop_duplicates(["DEMAND_ID", "SHORT_REASON"])
+    # DEMAND_ID별 첫 OPER_ID (SHORT_REASON과 무관하게 SHORT_LOG에서 처음 나온 행)
+    demand_oper = first_oper.drop_duplicates("DEMAND_ID").set_index("DEMAND_ID")["OPER_ID"]
+
+    reason = pd.Series("", index=merged_df.index, dtype=object)
+    pending = merged_df["SHORT_QTY"] > 0
+    for short_reason, template in REASON_RULES:
+        reason_ids = first_oper.loc[first_oper["SHORT_REASON"] == short_reason, "DEMAND_ID"]
+        mask = pending & merged_df["DEMAND_ID"].isin(reason_ids)
+        if "{oper}" in template:
+            messages = demand_oper[demand_oper.index.isin(reason_ids)].map(lambda oper: template.format(oper=oper))
+            reason[mask] = merged_df.loc[mask, "DEMAND_ID"].map(messages)
+        else:
+            reason[mask] = template
+        pending &= ~mask
+    return reason
+
+def summarize_short_log(short_log):
+    """SHORT_LOG를 DEMAND_ID당 한 행(대표 SHORT_REASON과 전체 SHORT_REASON 목록)으로 요약하는 함수"""
+    reasons = short_log[["DEMAND_ID", "SHORT_REASON"]].dropna().drop_duplicates()
+
+    # REASON_RULES에서 앞선 사유를 대표 사유로 사용 (규칙에 없는 사유는 뒤로)
+    rank = {short_reason: i for i, (short_reason, _) in enumerate(REASON_RULES)}
+    reasons["RANK"] = reasons["SHORT_REASON"].map(rank).fillna(len(rank))
+    reasons = reasons.sort_values(["DEMAND_ID", "RANK"], kind="stable")
+
+    return reasons.groupby("DEMAND_ID", as_index=False).agg(
+        SHORT_REASON=("SHORT_REASON", "first"),
+        SHORT_REASONS=("SHORT_REASON", ", ".join),
+    )
 
-    # DEMAND.parquet 파일 확인 및 읽기
-    if "DEMAND.parquet" not in uploaded_files:
-        st.error("DEMAND.parquet 파일이 필요합니다.")
-        return
-    demand = pd.read_parquet(uploaded_files["DEMAND.parquet"], engine="pyarrow")
+def build_summary(tables):
+    """DEMAND별 출하 수량과 SHORT_QTY, SHORT_REASON, REASON을 결합한 결과 표를 만드는 함수"""
+    # 세 테이블을 동시에 읽기 (전체 로드 시간은 가장 오래 걸리는 테이블 수준)
+    loaded = tables.load_many(TABLES)
+    short_log = loaded["SHORT_LOG.parquet"]
+    shipment_plan = loaded["SHIPMENT_PLAN.parquet"]
+    demand = loaded["DEMAND.parquet"]
 
     # SHORT_LOG 데이터 처리
     filtered_df = short_log[short_log['SHORT_REASON'] == 'NoOpResourceInfo']
@@ -41,49 +79,31 @@ def show_page(uploaded_files):
 
     # DEMAND 데이터와 결합
     merged_df = pd.merge(demand, shipment_grouped, on="DEMAND_ID", how="left")
-    merged_df = pd.merge(merged_df, short_log[['DEMAND_ID', 'SHORT_REASON']], on="DEMAND_ID", how="left")
+    # SHORT_LOG는 DEMAND_ID당 한 행으로 요약한 뒤 결합 (DEMAND 행이 중복되지 않도록)
+    merged_df = pd.merge(merged_df, summarize_short_log(short_log), on="DEMAND_ID", how="left")
     merged_df["SHORT_QTY"] = merged_df["DEMAND_QTY"] - merged_df["TOTAL_QTY"].fillna(0)
 
-    # 첫 번째 조건: SHORT_QTY > 0이고 SHORT_REASON이 NoOpResourceInfo인 경우
-    no_op_resource_info_ids = set(short_log[short_log["SHORT_REASON"] == "NoOpResourceInfo"]["DEMAND_ID"])
-    merged_df["REASON"] = merged_df.apply(
-        lambda row: f"{short_log.loc[short_log['DEMAND_ID'] == row['DEMAND_ID'], 'OPER_ID'].iloc[0]} 공정에서 사용 할 수 있는 설비가 없음"
-        if row["SHORT_QTY"] > 0 and row["DEMAND_ID"] in no_op_resource_info_ids else "",
-        axis=1
-    )
-
-    # 두 번째 조건: SHORT_QTY > 0이고 REASON이 빈 값이며 SHORT_LOG에서 SHORT_REASON이 NoBwBomPathShort
-    no_reason_df = merged_df[(merged_df["SHORT_QTY"] > 0) & (merged_df["REASON"] == "")]
-    short_log_mapping = short_log[short_log["SHORT_REASON"] == "NoBwBomPathShort"]
-    bom_issue_ids = set(short_log_mapping["DEMAND_ID"])
-    merged_df.loc[
-        (merged_df["DEMAND_ID"].isin(bom_issue_ids)) & (merged_df["SHORT_QTY"] > 0) & (merged_df["REASON"] == ""),
-        "REASON"
-    ] = "투입까지 전개할 수 있는 BOM 정보가 없음"
-
-    # 세 번째 조건: SHORT_QTY > 0이고 REASON이 빈 값이며 SHORT_LOG에서 SHORT_REASON이 LackOfResourceCapacity
-    lack_of_capacity_mapping = short_log[short_log["SHORT_REASON"] == "LackOfResourceCapacity"]
-    capacity_issue_ids = set(lack_of_capacity_mapping["DEMAND_ID"])
-    merged_df.loc[
-        (merged_df["DEMAND_ID"].isin(capacity_issue_ids)) & (merged_df["SHORT_QTY"] > 0) & (merged_df["REASON"] == ""),
-        "REASON"
-    ] = merged_df.loc[
-        (merged_df["DEMAND_ID"].isin(capacity_issue_ids)) & (merged_df["SHORT_QTY"] > 0) & (merged_df["REASON"] == ""),
-        "DEMAND_ID"
-    ].apply(lambda x: f"{short_log.loc[short_log['DEMAND_ID'] == x, 'OPER_ID'].iloc[0]} 공정에서 사용할 수 있는 설비 Capa가 부족" if x in short_log["DEMAND_ID"].values else "Unknown")
-
-    # 네 번째 조건: SHORT_QTY > 0이고 REASON이 빈 값이며 SHORT_LOG에서 SHORT_REASON이 RemainingLots
-    remaining_lots_mapping = short_log[short_log["SHORT_REASON"] == "RemainingLots"]
-    remaining_lots_ids = set(remaining_lots_mapping["DEMAND_ID"])
-    merged_df.loc[
-        (merged_df["DEMAND_ID"].isin(remaining_lots_ids)) & (merged_df["SHORT_QTY"] > 0) & (merged_df["REASON"] == ""),
-        "REASON"
-    ] = "계획 생성 기간 내에 생산하지 못한 잔여 수량임. (계획 생성 기간을 늘릴 경우 생산할 수 있는 가능성이 있음.)"
+    # SHORT_QTY > 0인 DEMAND에 SHORT_REASON 우선순위대로 REASON 부여
+    merged_df["REASON"] = classify_short_reason(merged_df, short_log)
 
     # 컬럼 재정렬
     demand_columns = list(demand.columns)
-    new_columns = demand_columns[:demand_columns.index("DEMAND_QTY") + 1] + ["ON_TIME_QTY", "LATE_QTY", "SHORT_QTY", "SHORT_REASON", "REASON"] + demand_columns[demand_columns.index("DEMAND_QTY") + 1:]
-    merged_df = merged_df[new_columns]
+    new_columns = demand_columns[:demand_columns.index("DEMAND_QTY") + 1] + ["ON_TIME_QTY", "LATE_QTY", "SHORT_QTY", "SHORT_REASON", "SHORT_REASONS", "REASON"] + demand_columns[demand_columns.index("DEMAND_QTY") + 1:]
+    return merged_df[new_columns]
+
+AGGREGATES = {"short_log_analysis.summary": build_summary}
+
+def show_page(uploaded_files):
+    st.title("SHORT LOG 분석")
+
+    # SHORT_LOG, SHIPMENT_PLAN, DEMAND 파일 확인
+    for file in TABLES:
+        if file not in uploaded_files:
+            st.error(f"{file} 파일이 필요합니다.")
+            return
+
+    # 결과 표는 업로드당 한 번만 계산
+    merged_df = uploaded_files.aggregate("short_log_analysis.summary", build_summary)
 
     # 결과 출력
     st.subheader("SHORT_QTY 계산 결과 및 REASON 분석")
@@ -123,9 +143,11 @@ def show_page(uploaded_files):
     st.plotly_chart(fig)
 
 if __name__ == "__main__":
+    from utils.table_registry import TableRegistry
+
     uploaded_files = {
         "SHORT_LOG.parquet": "path/to/SHORT_LOG.parquet",
         "SHIPMENT_PLAN.parquet": "path/to/SHIPMENT_PLAN.parquet",
         "DEMAND.parquet": "path/to/DEMAND.parquet"
     }
-    show_page(uploaded_files)
+    show_page(TableRegistry(uploaded_files))
@@ -1,8 +1,88 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+# TARGET 수량과 공정별 설비 사용률로 NEED_DAYS 계산
+TABLES = {
+    "TARGET_PLAN.parquet": {"columns": ["ITEM_ID", "ROUTING_ID", "OPER_ID", "IN_OUT", "TARGET_QTY"], "categorical": True},
+    # 병합 후 OPER_TYPE == 'Operation'인 행만 남기므로 읽을 때 미리 필터링
+    "ROUTING_OPER.parquet": {
+        "columns": ["ROUTING_ID", "OPER_ID", "OPER_TYPE"],
+        "filters": [("OPER_TYPE", "==", "Operation")],
+        "categorical": True,
+    },
+    "OPER_RES.parquet": {"columns": ["ROUTING_ID", "OPER_ID", "RES_ID", "USAGE_PER"], "categorical": True},
+}
+
+def build_need_days(tables):
+    """ITEM_ID, OPER_ID별 TARGET_QTY와 설비 CAPA로 NEED_DAYS 표를 계산하는 함수 (NEED_DAYS 내림차순)"""
+    # 업로드된 Parquet 파일을 동시에 읽기 (전체 로드 시간은 가장 오래 걸리는 테이블 수준)
+    loaded = tables.load_many(TABLES)
+    target_plan_df = loaded["TARGET_PLAN.parquet"]
+    routing_oper_df = loaded["ROUTING_OPER.parquet"]
+    oper_res_df = loaded["OPER_RES.parquet"]
+
+    # IN_OUT 컬럼 값 정리
+    target_plan_df['IN_OUT'] = target_plan_df['IN_OUT'].str.strip()
+
+    # IN_OUT == 'Out'이고 ROUTING_ID와 OPER_ID가 빈값이 아닌 데이터 필터링
+    valid_out_df = target_plan_df[
+        (target_plan_df['IN_OUT'] == 'Out') &
+        target_plan_df['ROUTING_ID'].notnull() & (target_plan_df['ROUTING_ID'] != "") &
+        target_plan_df['OPER_ID'].notnull() & (target_plan_df['OPER_ID'] != "")
+    ]
+
+    # ROUTING_ID와 OPER_ID를 키로 ROUTING_OPER 테이블에서 데이터 찾기
+    merged_data = valid_out_df.merge(
+        routing_oper_df,
+        on=['ROUTING_ID', 'OPER_ID'],
+        how='left'
+    )
+
+    # OPER_TYPE이 'Operation'인 행 필터링
+    operation_rows = merged_data[merged_data['OPER_TYPE'] == 'Operation']
+
+    # ITEM_ID, ROUTING_ID와 OPER_ID를 그룹으로 TARGET_QTY의 합 계산
+    grouped_data = operation_rows.groupby(['ITEM_ID', 'ROUTING_ID', 'OPER_ID'], observed=True)['TARGET_QTY'].sum().reset_index()
+
+    # ROUTING_ID와 OPER_ID를 키로 OPER_RES 테이블에서 매칭된 행 수 계산, AVG_USAGE_PER 및 RES_IDS 생성
+    resource_usage = oper_res_df.groupby(['ROUTING_ID', 'OPER_ID'], observed=True).agg(
+        RES_COUNT=('USAGE_PER', 'size'),
+        RES_IDS=('RES_ID', lambda x: ','.join(x.astype(str))),
+        AVG_USAGE_PER=('USAGE_PER', 'mean')
+    ).reset_index()
+
+    # RES_COUNT, RES_IDS, AVG_USAGE_PER을 ITEM_ID, ROUTING_ID, OPER_ID 그룹 데이터에 추가
+    grouped_data = grouped_data.merge(
+        resource_usage,
+        on=['ROUTING_ID', 'OPER_ID'],
+        how='left'
+    )
+
+    # DAILY_MAX_OUTPUT 계산
+    grouped_data['DAILY_MAX_OUTPUT'] = 86400 / grouped_data['AVG_USAGE_PER']
+
+    # NEED_DAYS 계산
+    grouped_data['NEED_DAYS'] = grouped_data['TARGET_QTY'] / (grouped_data['DAILY_MAX_OUTPUT'] * grouped_data['RES_COUNT'])
+
+    # 결과 데이터에서 ROUTING_ID는 제거
+    grouped_data = grouped_data.drop(columns=['ROUTING_ID'], errors='ignore')
+
+    # 차트에 표시하기 전 소수점 셋째 자리에서 반올림 및 NEED_DAYS 기준 정렬
+    display_data = grouped_data.copy()
+    display_data['TARGET_QTY'] = display_data['TARGET_QTY'].round(2)
+    display_data['RES_COUNT'] = display_data['RES_COUNT'].round(2)
+    display_data['AVG_USAGE_PER'] = display_data['AVG_USAGE_PER'].round(2)
+    display_data['DAILY_MAX_OUTPUT'] = display_data['DAILY_MAX_OUTPUT'].round(2)
+    display_data['NEED_DAYS'] = display_data['NEED_DAYS'].round(2)
+    display_data = display_data.sort_values(by='NEED_DAYS', ascending=False)
+
+    # X축: ITEM_ID + '#' + OPER_ID (ITEM_ID, OPER_ID는 categorical이므로 집계가 끝난 결과에서 문자열로 변환하여 결합)
+    display_data['X_AXIS'] = display_data['ITEM_ID'].astype(str) + '#' + display_data['OPER_ID'].astype(str)
+    return display_data
+
+AGGREGATES = {"target_capa_analysis.need_days": build_need_days}
+
 def show_page(uploaded_files):
     st.title("TARGET 대비 CAPA 분석 - Operation 데이터 확인")
 
@@ -16,71 +96,13 @@ def show_page(uploaded_files):
         return
 
     try:
-        # 업로드된 Parquet 파일 읽기
-        target_plan_df = pd.read_parquet(uploaded_files["TARGET_PLAN.parquet"], engine='pyarrow')
-        routing_oper_df = pd.read_parquet(uploaded_files["ROUTING_OPER.parquet"], engine='pyarrow')
-        oper_res_df = pd.read_parquet(uploaded_files["OPER_RES.parquet"], engine='pyarrow')
-
-        # IN_OUT 컬럼 값 정리
-        target_plan_df['IN_OUT'] = target_plan_df['IN_OUT'].str.strip()
-
-        # IN_OUT == 'Out'이고 ROUTING_ID와 OPER_ID가 빈값이 아닌 데이터 필터링
-        valid_out_df = target_plan_df[
-            (target_plan_df['IN_OUT'] == 'Out') &
-            target_plan_df['ROUTING_ID'].notnull() & (target_plan_df['ROUTING_ID'] != "") &
-            target_plan_df['OPER_ID'].notnull() & (target_plan_df['OPER_ID'] != "")
-        ]
-
-        # ROUTING_ID와 OPER_ID를 키로 ROUTING_OPER 테이블에서 데이터 찾기
-        merged_data = valid_out_df.merge(
-            routing_oper_df,
-            on=['ROUTING_ID', 'OPER_ID'],
-            how='left'
-        )
-
-        # OPER_TYPE이 'Operation'인 행 필터링
-        operation_rows = merged_data[merged_data['OPER_TYPE'] == 'Operation']
-
-        # ITEM_ID, ROUTING_ID와 OPER_ID를 그룹으로 TARGET_QTY의 합 계산
-        grouped_data = operation_rows.groupby(['ITEM_ID', 'ROUTING_ID', 'OPER_ID'])['TARGET_QTY'].sum().reset_index()
-
-        # ROUTING_ID와 OPER_ID를 키로 OPER_RES 테이블에서 매칭된 행 수 계산, AVG_USAGE_PER 및 RES_IDS 생성
-        resource_usage = oper_res_df.groupby(['ROUTING_ID', 'OPER_ID']).agg(
-            RES_COUNT=('USAGE_PER', 'size'),
-            RES_IDS=('RES_ID', lambda x: ','.join(x.astype(str))),
-            AVG_USAGE_PER=('USAGE_PER', 'mean')
-        ).reset_index()
-
-        # RES_COUNT, RES_IDS, AVG_USAGE_PER을 ITEM_ID, ROUTING_ID, OPER_ID 그룹 데이터에 추가
-        grouped_data = grouped_data.merge(
-            resource_usage,
-            on=['ROUTING_ID', 'OPER_ID'],
-            how='left'
-        )
-
-        # DAILY_MAX_OUTPUT 계산
-        grouped_data['DAILY_MAX_OUTPUT'] = 86400 / grouped_data['AVG_USAGE_PER']
-
-        # NEED_DAYS 계산
-        grouped_data['NEED_DAYS'] = grouped_data['TARGET_QTY'] / (grouped_data['DAILY_MAX_OUTPUT'] * grouped_data['RES_COUNT'])
-
-        # 결과 데이터에서 ROUTING_ID는 제거
-        grouped_data = grouped_data.drop(columns=['ROUTING_ID'], errors='ignore')
-
-        # 차트에 표시하기 전 소수점 셋째 자리에서 반올림 및 NEED_DAYS 기준 정렬
-        display_data = grouped_data.copy()
-        display_data['TARGET_QTY'] = display_data['TARGET_QTY'].round(2)
-        display_data['RES_COUNT'] = display_data['RES_COUNT'].round(2)
-        display_data['AVG_USAGE_PER'] = display_data['AVG_USAGE_PER'].round(2)
-        display_data['DAILY_MAX_OUTPUT'] = display_data['DAILY_MAX_OUTPUT'].round(2)
-        display_data['NEED_DAYS'] = display_data['NEED_DAYS'].round(2)
-        display_data = display_data.sort_values(by='NEED_DAYS', ascending=False)
+        # NEED_DAYS 표는 업로드당 한 번만 계산
+        display_data = uploaded_files.aggregate("target_capa_analysis.need_days", build_need_days)
 
         st.write("**NEED_DAYS 계산 표**")
         st.dataframe(display_data[['ITEM_ID', 'OPER_ID', 'TARGET_QTY', 'RES_COUNT', 'RES_IDS', 'AVG_USAGE_PER', 'DAILY_MAX_OUTPUT', 'NEED_DAYS']])
 
         # X축: ITEM_ID + '#' + OPER_ID, Y축: NEED_DAYS 기준 차트 생성 (전체 데이터 포함)
-        display_data['X_AXIS'] = display_data['ITEM_ID'] + '#' + display_data['OPER_ID']
         fig = px.bar(display_data, x='X_AXIS', y='NEED_DAYS', title='NEED_DAYS 기준 차트 (전체 데이터)', labels={'X_AXIS': 'ITEM_ID#OPER_ID', 'NEED_DAYS': 'NEED_DAYS'})
 
         # X축 스크롤링 조건 설정 (10개 초과일 경우만)
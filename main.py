@@ -1,85 +1,85 @@
+import importlib
+import sys
+import time
+
+# 업로드 화면 표시까지 걸린 시간 측정 시작
+_started = time.perf_counter()
+
 import streamlit as st
-import os
-import zipfile
-import tempfile
-import custom_pages.demand_analysis as demand
-import custom_pages.equipment_detail as equipment
-import custom_pages.group_operation_rate as group_rate
-import custom_pages.target_capa_analysis as target_capa
-import custom_pages.process_output_summary as process_output
-import custom_pages.short_log_analysis as short_log
-# import custom_pages.isu_result_analysis as isu_result
-import custom_pages.setup_count_by_res as res_setup
-import custom_pages.setup_count_by_product as product_setup
-import custom_pages.equipment_buffer_wip as buffer_wip
-import custom_pages.equipment_oper_wip as oper_wip
 
-def extract_parquet_from_zip(zip_path, extract_to):
-    """ZIP 파일에서 .parquet 파일을 재귀적으로 추출하는 함수"""
-    with zipfile.ZipFile(zip_path, 'r') as zipf:
-        zipf.extractall(extract_to)
+# 사이드바 페이지 이름과 페이지 모듈 경로 (선택한 페이지만 처음 표시할 때 import)
+PAGES = {
+    "DEMAND_QTY 분석": "custom_pages.demand_analysis",
+    "장비 그룹별 가동율 현황": "custom_pages.group_operation_rate",
+    "장비 그룹별 개별 가동율 현황": "custom_pages.equipment_detail",
+    "TARGET 대비 CAPA 분석": "custom_pages.target_capa_analysis",
+    "공정별 생산량 분석": "custom_pages.process_output_summary",
+    "SHORT LOG 분석": "custom_pages.short_log_analysis",
+    # "Parquet 파일 비교 분석": "custom_pages.isu_result_analysis",
+    "설비별 Setup 횟수": "custom_pages.setup_count_by_res",
+    "제품별 Setup 횟수": "custom_pages.setup_count_by_product",
+    "설비 대기 BUFFER&ITEM별 재공 수량": "custom_pages.equipment_buffer_wip",
+    "설비 대기 OPER&ITEM별 재공 수량": "custom_pages.equipment_oper_wip",
+}
 
-    # 추출된 폴더에서 모든 .parquet 파일 찾기
-    found_files = {}
-    for root, _, files in os.walk(extract_to):
-        for file in files:
-            if file.endswith(".parquet"):
-                found_files[file] = os.path.join(root, file)
-    return found_files
+def load_page(label):
+    """페이지 모듈을 반환 (처음 선택한 경우에만 import하고 걸린 시간을 반환)"""
+    module_path = PAGES[label]
+    # 백그라운드 준비 작업이 import 중인 모듈은 import_module이 import가 끝날 때까지 기다림
+    # (sys.modules에 있어도 초기화 중일 수 있으므로 항상 import_module을 거침)
+    imported = module_path in sys.modules
+    started = time.perf_counter()
+    module = importlib.import_module(module_path)
+    return module, None if imported else time.perf_counter() - started
 
 # Streamlit UI
 st.title("Parquet 파일 분석 도구")
 
 # ZIP 파일 업로드
 uploaded_file = st.file_uploader("ZIP 파일을 업로드하세요", type=["zip"])
+st.sidebar.caption(f"업로드 화면 표시: {(time.perf_counter() - _started) * 1000:.0f} ms")
 
 if uploaded_file:
-    with tempfile.TemporaryDirectory() as temp_dir:
-        zip_path = os.path.join(temp_dir, uploaded_file.name)
-        
-        # 업로드된 ZIP 파일을 임시 경로에 저장
-        with open(zip_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+    # pandas/pyarrow를 사용하는 업로드 캐시는 파일이 업로드된 뒤에 import
+    from utils.page_warmup import show_warmup_status
+    from utils.upload_cache import load_uploaded_zip
+
+    # 같은 ZIP이면 재실행/다른 세션에서도 캐시 항목을 재사용 (SHA-256 기준 캐시)
+    # 페이지에는 파일 경로 대신 테이블을 한 번만 디코딩하는 레지스트리를 전달
+    entry = load_uploaded_zip(uploaded_file)
+    found_files = entry.registry
+
+    # 필요한 파일이 있는 모든 페이지의 집계를 백그라운드에서 미리 계산 (ZIP당 한 번 시작)
+    warmup = entry.warmup(PAGES)
+
+    if found_files:
+        st.success(f"{len(found_files)}개의 Parquet 파일을 발견했습니다.")
+    else:
+        st.error("ZIP 파일에 .parquet 파일이 포함되어 있지 않습니다.")
 
-        # ZIP 파일에서 .parquet 파일 추출
-        found_files = extract_parquet_from_zip(zip_path, temp_dir)
+    # 페이지 선택
+    st.sidebar.subheader("페이지 선택")
+    page = st.sidebar.radio("페이지를 선택하세요", list(PAGES))
+    with st.sidebar:
+        show_warmup_status(warmup)
 
-        if found_files:
-            st.success(f"{len(found_files)}개의 Parquet 파일을 발견했습니다.")
-        else:
-            st.error("ZIP 파일에 .parquet 파일이 포함되어 있지 않습니다.")
-        
-        # 페이지 선택
-        st.sidebar.subheader("페이지 선택")
-        page = st.sidebar.radio(
-            "페이지를 선택하세요",
-            ["DEMAND_QTY 분석", "장비 그룹별 가동율 현황", "장비 그룹별 개별 가동율 현황", "TARGET 대비 CAPA 분석", "공정별 생산량 분석", "SHORT LOG 분석",
-             #"Parquet 파일 비교 분석", 
-             "설비별 Setup 횟수", "제품별 Setup 횟수", "설비 대기 ITEM별 재공 수량", "설비 대기 OPER&ITEM별 재공 수량"]
-        )
+    # 페이지 라우팅 (선택한 페이지 모듈만 import)
+    # 보고 있는 페이지를 먼저 계산하고, 화면을 그리는 동안 백그라운드 작업은 새 집계를 시작하지 않음
+    warmup.prioritize(page)
+    page_module, import_seconds = load_page(page)
+    if import_seconds is not None:
+        st.sidebar.caption(f"페이지 모듈 로드: {import_seconds * 1000:.0f} ms")
+    with warmup.foreground():
+        page_module.show_page(found_files)
 
-        # 페이지 라우팅
-        if page == "DEMAND_QTY 분석":
-            demand.show_page(found_files)
-        elif page == "장비 그룹별 가동율 현황":
-            group_rate.show_page(found_files)
-        elif page == "장비 그룹별 개별 가동율 현황":
-            equipment.show_page(found_files)
-        elif page == "TARGET 대비 CAPA 분석":
-            target_capa.show_page(found_files)
-        elif page == "공정별 생산량 분석":
-            process_output.show_page(found_files)
-        elif page == "SHORT LOG 분석":
-            short_log.show_page(found_files)
-        # elif page == "Parquet 파일 비교 분석":
-            # isu_result.show_page()
-        elif page == "설비별 Setup 횟수":
-            res_setup.show_page(found_files)
-        elif page == "제품별 Setup 횟수":
-            product_setup.show_page(found_files)
-        elif page == "설비 대기 BUFFER&ITEM별 재공 수량":
-            buffer_wip.show_page(found_files)
-        elif page == "설비 대기 OPER&ITEM별 재공 수량": 
-            oper_wip.show_page(found_files)
+    st.sidebar.caption(
+        f"테이블 캐시: hit {found_files.hits} / miss {found_files.misses}"
+        f" / 이전 업로드 집계 재사용 {found_files.reused_aggregates}"
+        f" / 저장된 집계 사용 {found_files.stored_aggregates}"
+    )
+    if found_files.load_times:
+        with st.sidebar.expander("테이블 로드 시간"):
+            for name, seconds in found_files.load_times.items():
+                st.caption(f"{name}: {seconds * 1000:.0f} ms")
 else:
     st.warning("ZIP 파일을 업로드하세요.")
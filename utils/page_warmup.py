@@ -0,0 +1,156 @@
+import importlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+# 업로드 후 페이지 집계를 미리 계산하는 스레드 수와 사이드바 진행 상황 갱신 주기 (환경 변수로 조정 가능)
+WARMUP_WORKERS = int(os.environ.get("PAGE_WARMUP_WORKERS", "2"))
+REFRESH_SECONDS = float(os.environ.get("PAGE_WARMUP_REFRESH_SECONDS", "1"))
+
+# 프로세스 공용 스레드 풀 (집계 중 테이블 디코딩은 테이블 레지스트리의 스레드 풀에서 동시에 수행)
+_warmup_pool = ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix="page-warmup")
+
+# 페이지 준비 상태와 사이드바 표시
+QUEUED, RUNNING, READY, MISSING, FAILED = "queued", "running", "ready", "missing", "failed"
+STATUS_ICONS = {QUEUED: "⏳", RUNNING: "🔄", READY: "✅", MISSING: "➖", FAILED: "⚠️"}
+
+
+class PageWarmup:
+    """업로드 하나에 대해 모든 페이지의 집계(AGGREGATES)를 백그라운드에서 미리 계산하는 작업 목록
+
+    페이지 모듈은 두 가지를 모듈 수준에 정의한다.
+    - TABLES: {파일명: {"columns", "filters", "categorical"}} 읽는 테이블과 load() 인자.
+      시작할 때 모든 페이지의 TABLES를 레지스트리에 declare()하여 파일마다 한 번만 디코딩한다.
+    - AGGREGATES: {집계 이름: build 함수} 화면에서 aggregate()로 받는 집계.
+      저장된 결과(업로드 간 공유, 디스크 sidecar)가 있으면 테이블을 읽지 않고 그 결과를 사용한다.
+
+    TABLES 파일이 모두 있는 페이지만 계산하며, 결과는 레지스트리의 aggregate()에 남으므로
+    이후 페이지를 열면 계산 없이 바로 표시된다. 같은 집계를 화면에서 먼저 요청하면 계산 중인 결과를 기다려 받는다.
+    사용자가 보고 있는 페이지는 prioritize()로 대기열 맨 앞으로 옮기고,
+    foreground() 안에서 화면을 그리는 동안에는 새 집계를 시작하지 않고 기다린다.
+    """
+
+    def __init__(self, registry, pages):
+        self.registry = registry
+        self._pending = list(pages)
+        self._pages = dict(pages)
+        self._status = dict.fromkeys(pages, QUEUED)
+        self._progress = dict.fromkeys(pages, (0, 0))
+        self._foreground = 0
+        self._cancelled = False
+        self._condition = threading.Condition()
+
+        # 테이블을 디코딩하기 전에 모든 페이지의 TABLES를 등록하여 파일마다 필요한 컬럼을 한 번에 읽도록 함
+        for module_path in self._pages.values():
+            registry.declare(getattr(importlib.import_module(module_path), "TABLES", {}))
+        for _ in range(WARMUP_WORKERS):
+            _warmup_pool.submit(self._run)
+
+    @property
+    def finished(self):
+        with self._condition:
+            return not self._pending and all(status != RUNNING for status in self._status.values())
+
+    def status(self):
+        """{페이지 이름: (상태, 완료한 집계 수, 전체 집계 수)}"""
+        with self._condition:
+            return {label: (self._status[label], *self._progress[label]) for label in self._pages}
+
+    def prioritize(self, label):
+        """아직 시작하지 않은 페이지를 대기열 맨 앞으로 옮기는 함수"""
+        with self._condition:
+            if label in self._pending:
+                self._pending.remove(label)
+                self._pending.insert(0, label)
+
+    def foreground(self):
+        """화면을 그리는 동안 백그라운드 작업이 새 집계를 시작하지 않도록 하는 컨텍스트"""
+        return _Foreground(self)
+
+    def cancel(self):
+        """남은 작업 취소 (업로드 항목이 캐시에서 삭제될 때 호출)"""
+        with self._condition:
+            self._cancelled = True
+            self._pending.clear()
+            self._condition.notify_all()
+
+    def _next(self, label=None):
+        # 화면 작업이 끝날 때까지 기다렸다가 다음 페이지(또는 같은 페이지의 다음 집계) 진행 여부 반환
+        with self._condition:
+            self._condition.wait_for(lambda: self._cancelled or self._foreground == 0)
+            if self._cancelled:
+                return None
+            if label is not None:
+                return label
+            if not self._pending:
+                return None
+            # 대기열에서 꺼내는 것과 계산 중 표시를 함께 하여 finished가 중간 상태를 보지 않도록 함
+            label = self._pending.pop(0)
+            self._status[label] = RUNNING
+            return label
+
+    def _run(self):
+        while (label := self._next()) is not None:
+            try:
+                status = self._warm(label)
+            except Exception:
+                # 오류는 화면에서 페이지를 열 때 다시 계산하며 표시
+                status = FAILED
+            with self._condition:
+                self._status[label] = status
+
+    def _warm(self, label):
+        module = importlib.import_module(self._pages[label])
+        if not all(name in self.registry for name in getattr(module, "TABLES", {})):
+            return MISSING
+
+        aggregates = getattr(module, "AGGREGATES", {})
+        for done, (key, build) in enumerate(aggregates.items()):
+            with self._condition:
+                self._progress[label] = (done, len(aggregates))
+            if self._next(label) is None:
+                return QUEUED
+            self.registry.aggregate(key, build)
+        with self._condition:
+            self._progress[label] = (len(aggregates), len(aggregates))
+        return READY
+
+
+class _Foreground:
+    def __init__(self, warmup):
+        self._warmup = warmup
+
+    def __enter__(self):
+        with self._warmup._condition:
+            self._warmup._foreground += 1
+
+    def __exit__(self, *exc):
+        with self._warmup._condition:
+            self._warmup._foreground -= 1
+            self._warmup._condition.notify_all()
+
+
+def _status_label(status, done, total):
+    if status == RUNNING and total:
+        return f"{STATUS_ICONS[status]} {done}/{total}"
+    return STATUS_ICONS[status]
+
+
+def _show_status(warmup, refreshing):
+    statuses = warmup.status()
+    ready = sum(status in (READY, MISSING) for status, _, _ in statuses.values())
+    st.progress(ready / len(statuses), text=f"페이지 미리 계산: {ready}/{len(statuses)}")
+    for label, (status, done, total) in statuses.items():
+        st.caption(f"{_status_label(status, done, total)} {label}")
+
+    # 모든 페이지 계산이 끝나면 한 번 전체를 다시 실행하여 주기적 갱신 중지
+    if refreshing and warmup.finished:
+        st.rerun()
+
+
+def show_warmup_status(warmup):
+    """페이지별 준비 상태와 진행률 표시 (계산 중에는 이 부분만 REFRESH_SECONDS마다 다시 실행)"""
+    refreshing = not warmup.finished
+    st.fragment(_show_status, run_every=REFRESH_SECONDS if refreshing else None)(warmup, refreshing)
@@ -0,0 +1,196 @@
+import math
+import os
+import tempfile
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# 파일별 기본 비교 키 (없는 파일은 화면에서 직접 선택)
+KEY_COLUMNS = {
+    "DEMAND.parquet": ["DEMAND_ID"],
+    "SHORT_LOG.parquet": ["DEMAND_ID", "OPER_ID"],
+    "RES_PLAN.parquet": ["RES_ID", "PLAN_DATE"],
+    "RES_MASTER.parquet": ["RES_ID"],
+}
+
+# 스트리밍 단위와 파티션 크기 (파티션 하나만 메모리에 올려 비교)
+BATCH_SIZE = 64 * 1024
+PARTITION_ROWS = 1_000_000
+SAMPLE_ROWS = 50
+
+_KEY_HASH = "__KEY_HASH"
+_ROW_DIGEST = "__ROW_DIGEST"
+_OCCURRENCE = "__OCCURRENCE"
+
+# 비교 결과 상태 (폴더1 기준)
+ADDED, REMOVED, CHANGED = "추가", "삭제", "변경"
+
+
+def _hash(frame):
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype="uint64")
+
+
+def _hashed_batches(path, key_columns, value_columns):
+    # 레코드 배치 단위로 읽어 (배치, 키 해시, 행 digest, 컬럼별 해시) 반환
+    with pq.ParquetFile(path) as parquet_file:
+        for batch in parquet_file.iter_batches(batch_size=BATCH_SIZE, columns=key_columns + value_columns):
+            frame = batch.to_pandas()
+            column_hashes = {column: _hash(frame[column]) for column in value_columns}
+            row_digest = _hash(pd.DataFrame(column_hashes)) if value_columns else np.zeros(len(frame), dtype="uint64")
+            yield batch, _hash(frame[key_columns]), row_digest, column_hashes
+
+
+def _partition(path, key_columns, value_columns, partitions, spill_dir, side):
+    # 키 해시로 행을 나눠 (키 값, 키 해시, 행 digest, 컬럼별 해시)만 파티션 파일에 기록
+    writers = {}
+    try:
+        for batch, key_hash, row_digest, column_hashes in _hashed_batches(path, key_columns, value_columns):
+            table = pa.table(
+                [batch.column(column) for column in key_columns]
+                + [pa.array(key_hash), pa.array(row_digest)]
+                + [pa.array(column_hashes[column]) for column in value_columns],
+                names=key_columns + [_KEY_HASH, _ROW_DIGEST] + value_columns,
+            )
+            part = key_hash % partitions
+            order = np.argsort(part, kind="stable")
+            bounds = np.searchsorted(part[order], np.arange(partitions + 1))
+            for p in range(partitions):
+                if bounds[p] == bounds[p + 1]:
+                    continue
+                if p not in writers:
+                    writers[p] = pa.ipc.new_file(os.path.join(spill_dir, f"{side}_{p}.arrow"), table.schema)
+                writers[p].write_table(table.take(order[bounds[p]:bounds[p + 1]]))
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+
+def _read_partition(spill_dir, side, p):
+    path = os.path.join(spill_dir, f"{side}_{p}.arrow")
+    if not os.path.exists(path):
+        return None
+    # 파티션 파일은 임시 폴더와 함께 삭제되므로 메모리 맵 대신 메모리로 읽음
+    with pa.OSFile(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _compare_partition(left, right, key_columns, value_columns):
+    # 같은 키가 여러 번 나오면 순번까지 키로 사용하여 1:1로 맞춤
+    for frame in (left, right):
+        frame[_OCCURRENCE] = frame.groupby(key_columns, dropna=False).cumcount()
+    keys = [_KEY_HASH, *key_columns, _OCCURRENCE]
+
+    # 추가/삭제는 키만으로, 변경은 양쪽에 모두 있는 행의 digest로 판단 (해시 컬럼이 NaN으로 바뀌지 않도록 분리)
+    matched = left[keys].merge(right[keys], on=keys, how="outer", indicator=True)
+    both = left.merge(right, on=keys, how="inner", suffixes=("_1", "_2"))
+    changed = both[both[f"{_ROW_DIGEST}_1"] != both[f"{_ROW_DIGEST}_2"]]
+    column_changes = {
+        column: int((changed[f"{column}_1"] != changed[f"{column}_2"]).sum()) for column in value_columns
+    }
+    # 같은 키가 여러 번 나오는 행도 구분하도록 (키 해시, 순번)으로 반환
+    sample_keys = [_KEY_HASH, _OCCURRENCE]
+    statuses = {
+        ADDED: matched.loc[matched["_merge"] == "right_only", sample_keys],
+        REMOVED: matched.loc[matched["_merge"] == "left_only", sample_keys],
+        CHANGED: changed[sample_keys],
+    }
+    return statuses, column_changes, len(both) - len(changed)
+
+
+def _sample_rows(paths, key_columns, value_columns, sample):
+    # 샘플로 고른 (키 해시, 순번)에 해당하는 원본 행만 다시 스트리밍하여 수집
+    # 순번은 파일 순서대로 센 같은 키의 등장 횟수 (파티션 비교의 순번과 같음)
+    sample_hashes = np.fromiter({key_hash for key_hash, _ in sample}, dtype="uint64")
+    frames = []
+    for source, path in paths.items():
+        seen = Counter()
+        for batch, key_hash, _, _ in _hashed_batches(path, key_columns, value_columns):
+            candidates = np.flatnonzero(np.isin(key_hash, sample_hashes))
+            selected, keys = [], []
+            for i in candidates:
+                key = (int(key_hash[i]), seen[int(key_hash[i])])
+                seen[key[0]] += 1
+                if key in sample:
+                    selected.append(i)
+                    keys.append(key)
+            if not selected:
+                continue
+            frame = batch.take(selected).to_pandas()
+            frame.insert(0, "출처", source)
+            frame.insert(0, "상태", [sample[key] for key in keys])
+            frame[_KEY_HASH] = [key_hash for key_hash, _ in keys]
+            frame[_OCCURRENCE] = [occurrence for _, occurrence in keys]
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["상태", "출처", *key_columns, *value_columns])
+    samples = pd.concat(frames, ignore_index=True)
+    samples = samples.sort_values(["상태", _KEY_HASH, _OCCURRENCE, "출처"], kind="stable")
+    return samples.drop(columns=[_KEY_HASH, _OCCURRENCE]).reset_index(drop=True)
+
+
+def diff_parquet_tables(path1, path2, key_columns, spill_dir=None):
+    """두 PARQUET 파일을 키 기준으로 행 단위 비교하는 함수 (파일 크기와 무관하게 파티션 단위 메모리 사용)
+
+    1) 두 파일을 레코드 배치로 읽어 키 해시로 파티션을 나누고 행 digest와 컬럼별 해시만 디스크에 기록
+    2) 파티션별로 두 파일을 키로 맞춰 추가/삭제/변경 행과 컬럼별 변경 행 수 계산
+    3) 샘플로 고른 키의 원본 행만 다시 읽어 반환
+
+    반환값: {"added", "removed", "changed", "unchanged": 행 수,
+            "column_changes": 컬럼별 변경 행 수 DataFrame, "samples": 차이 행 샘플 DataFrame}
+    """
+    # 푸터만 읽고 파일 핸들은 바로 닫음
+    with pq.ParquetFile(path1) as file1, pq.ParquetFile(path2) as file2:
+        schema1, schema2 = file1.schema_arrow, file2.schema_arrow
+        num_rows = max(file1.metadata.num_rows, file2.metadata.num_rows)
+    key_columns = list(key_columns)
+    missing = [column for column in key_columns if column not in schema1.names or column not in schema2.names]
+    if missing:
+        raise ValueError(f"두 파일에 모두 있는 키 컬럼이 아닙니다: {', '.join(missing)}")
+    value_columns = [
+        column for column in schema1.names if column in schema2.names and column not in key_columns
+    ]
+
+    partitions = max(1, math.ceil(num_rows / PARTITION_ROWS))
+
+    counts = {ADDED: 0, REMOVED: 0, CHANGED: 0}
+    column_changes = dict.fromkeys(value_columns, 0)
+    unchanged = 0
+    sample = {}
+    with tempfile.TemporaryDirectory(dir=spill_dir) as spill:
+        _partition(path1, key_columns, value_columns, partitions, spill, "1")
+        _partition(path2, key_columns, value_columns, partitions, spill, "2")
+
+        for p in range(partitions):
+            left = _read_partition(spill, "1", p)
+            right = _read_partition(spill, "2", p)
+            if left is None and right is None:
+                continue
+            # 한쪽에만 있는 파티션은 반대쪽 스키마의 빈 테이블과 비교
+            left = left if left is not None else right.schema.empty_table()
+            right = right if right is not None else left.schema.empty_table()
+            statuses, changes, same = _compare_partition(left.to_pandas(), right.to_pandas(), key_columns, value_columns)
+            unchanged += same
+            for column, count in changes.items():
+                column_changes[column] += count
+            for status, rows in statuses.items():
+                counts[status] += len(rows)
+                # 상태별로 SAMPLE_ROWS개의 (키, 순번)까지만 샘플로 보관
+                taken = sum(1 for s in sample.values() if s == status)
+                for key_hash, occurrence in rows.iloc[:max(0, SAMPLE_ROWS - taken)].itertuples(index=False):
+                    sample.setdefault((int(key_hash), int(occurrence)), status)
+
+    samples = _sample_rows({"폴더1": path1, "폴더2": path2}, key_columns, value_columns, sample)
+    column_changes = pd.DataFrame(
+        {"컬럼": list(column_changes), "변경 행 수": list(column_changes.values())}
+    ).sort_values("변경 행 수", ascending=False, kind="stable").reset_index(drop=True)
+    return {
+        "added": counts[ADDED],
+        "removed": counts[REMOVED],
+        "changed": counts[CHANGED],
+        "unchanged": unchanged,
+        "column_changes": column_changes,
+        "samples": samples,
+    }
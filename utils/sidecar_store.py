@@ -0,0 +1,192 @@
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# 저장 형식 버전 (저장 형식이 바뀌면 올려서 이전 결과를 무시)
+STORE_VERSION = 1
+
+# 집계 함수가 공통으로 사용하는 모듈 (코드가 바뀌면 모든 저장된 결과를 다시 계산)
+DEPENDENCY_MODULES = ("utils.table_registry", "utils.time_rollup", "utils.wip", "utils.zip_reader")
+
+# 집계 결과를 되살릴 수 있는 클래스의 모듈 (임의의 클래스를 만들지 않도록 제한)
+_OBJECT_MODULES = ("utils.", "custom_pages.")
+
+
+def _code_version(build):
+    # build가 정의된 모듈 파일과 공통 모듈 파일을 합친 해시 (어느 쪽 코드가 바뀌어도 저장된 결과를 다시 계산)
+    paths = [inspect.getsourcefile(build)]
+    paths += [importlib.util.find_spec(module).origin for module in DEPENDENCY_MODULES]
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _write_table(directory, files, table):
+    name = f"{len(files)}.arrow"
+    with pa.OSFile(os.path.join(directory, name), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    files.append(name)
+    return name
+
+
+def _read_table(directory, name):
+    with pa.OSFile(os.path.join(directory, name)) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _encode(value, directory, files):
+    """집계 결과를 JSON 트리로 바꾸는 함수 (DataFrame과 배열은 Arrow IPC 파일로 기록)"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.DataFrame):
+        return {"__frame__": _write_table(directory, files, pa.Table.from_pandas(value))}
+    if isinstance(value, np.ndarray):
+        if value.ndim != 1:
+            raise TypeError("1차원 배열만 저장할 수 있습니다.")
+        return {"__array__": _write_table(directory, files, pa.table({"values": pa.array(value)}))}
+    if isinstance(value, pd.Timedelta):
+        return {"__timedelta__": value.value}
+    if isinstance(value, datetime):
+        return {"__timestamp__": str(value)}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, time):
+        return {"__time__": value.isoformat()}
+    if isinstance(value, dict):
+        return {"__dict__": [[_encode(k, directory, files), _encode(v, directory, files)] for k, v in value.items()]}
+    if isinstance(value, (list, tuple)):
+        tag = "__tuple__" if isinstance(value, tuple) else "__list__"
+        return {tag: [_encode(item, directory, files) for item in value]}
+    cls = type(value)
+    if cls.__module__.startswith(_OBJECT_MODULES) and hasattr(value, "__dict__"):
+        return {"__object__": [cls.__module__, cls.__qualname__], "fields": _encode(vars(value), directory, files)}
+    raise TypeError(f"저장할 수 없는 집계 결과입니다: {cls.__name__}")
+
+
+def _decode(node, directory):
+    if not isinstance(node, dict):
+        return node
+    if "__frame__" in node:
+        return _read_table(directory, node["__frame__"]).to_pandas()
+    if "__array__" in node:
+        return _read_table(directory, node["__array__"]).column("values").to_numpy(zero_copy_only=False)
+    if "__timedelta__" in node:
+        return pd.Timedelta(node["__timedelta__"])
+    if "__timestamp__" in node:
+        return pd.Timestamp(node["__timestamp__"])
+    if "__date__" in node:
+        return date.fromisoformat(node["__date__"])
+    if "__time__" in node:
+        return time.fromisoformat(node["__time__"])
+    if "__dict__" in node:
+        return {_decode(k, directory): _decode(v, directory) for k, v in node["__dict__"]}
+    if "__tuple__" in node:
+        return tuple(_decode(item, directory) for item in node["__tuple__"])
+    if "__list__" in node:
+        return [_decode(item, directory) for item in node["__list__"]]
+    module, qualname = node["__object__"]
+    if not module.startswith(_OBJECT_MODULES):
+        raise TypeError(f"되살릴 수 없는 클래스입니다: {module}.{qualname}")
+    cls = importlib.import_module(module)
+    for part in qualname.split("."):
+        cls = getattr(cls, part)
+    obj = cls.__new__(cls)
+    obj.__dict__.update(_decode(node["fields"], directory))
+    return obj
+
+
+def _directory_bytes(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+
+
+class SidecarStore:
+    """업로드 ZIP(SHA-256)별 집계 결과를 디스크에 보관하는 저장소
+
+    집계 하나를 폴더 하나(manifest.json + Arrow IPC 파일)로 기록하며, 서버를 다시 시작해도 남아 있으므로
+    이미 분석한 ZIP을 다시 열면 Parquet 테이블을 디코딩하지 않고 저장된 결과로 페이지를 그린다.
+    manifest의 버전(STORE_VERSION, 집계 함수 모듈과 DEPENDENCY_MODULES의 해시)이 다르면 저장된 결과를 사용하지 않는다.
+    DataFrame/배열/기본 값과 그 dict·list·tuple 조합만 저장하며, 그래프처럼 저장할 수 없는 결과는 건너뛴다.
+    디스크 예산(budget)은 업로드마다 처음 결과를 기록할 때 확인하여 오래 사용하지 않은 업로드부터 삭제한다.
+    """
+
+    def __init__(self, root, digest, budget):
+        self.root = root
+        self.directory = os.path.join(root, digest)
+        self.budget = budget
+        self._pruned = False
+        self._prune_lock = threading.Lock()
+
+    def get(self, key, build):
+        """저장된 결과가 있으면 (결과, 사용한 테이블 이름), 없거나 버전이 다르면 None"""
+        path = os.path.join(self.directory, key)
+        try:
+            with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["version"] != [STORE_VERSION, _code_version(build)]:
+                return None
+            result = _decode(manifest["value"], path)
+            # 최근 사용한 업로드는 정리 대상에서 뒤로 미룸
+            os.utime(self.directory)
+        except (OSError, ValueError, KeyError, TypeError, pa.ArrowException):
+            return None
+        return result, frozenset(manifest["names"])
+
+    def put(self, key, build, result, names):
+        """집계 결과를 기록하는 함수 (저장할 수 없는 결과이거나 기록에 실패하면 건너뜀)"""
+        os.makedirs(self.directory, exist_ok=True)
+        # 임시 폴더에 모두 기록한 뒤 이름을 바꿔 반쯤 쓰인 결과가 읽히지 않도록 함
+        staging = tempfile.mkdtemp(prefix=f".{key}.", dir=self.directory)
+        try:
+            files = []
+            manifest = {
+                "version": [STORE_VERSION, _code_version(build)],
+                "names": sorted(names),
+                "value": _encode(result, staging, files),
+            }
+            with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+
+            target = os.path.join(self.directory, key)
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        # 저장소 전체 크기 확인은 파일을 모두 훑으므로 업로드당 처음 기록할 때 한 번만 수행
+        with self._prune_lock:
+            if self._pruned:
+                return
+            self._pruned = True
+        self._prune()
+
+    def _prune(self):
+        # 저장소 전체가 예산을 넘으면 오래 사용하지 않은 업로드의 결과부터 삭제 (현재 업로드는 유지)
+        entries = [os.path.join(self.root, name) for name in os.listdir(self.root)]
+        entries = sorted((path for path in entries if os.path.isdir(path)), key=os.path.getmtime)
+        sizes = {path: _directory_bytes(path) for path in entries}
+        total = sum(sizes.values())
+        for path in entries:
+            if total <= self.budget:
+                break
+            if path == self.directory:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= sizes[path]
@@ -0,0 +1,491 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# 여러 테이블을 동시에 디코딩할 때 사용하는 스레드 수 (환경 변수로 조정 가능)
+LOAD_WORKERS = int(os.environ.get("TABLE_LOAD_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# pyarrow는 디코딩 중 GIL을 해제하므로 프로세스 공용 스레드 풀에서 테이블을 동시에 디코딩
+_load_pool = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="table-load")
+
+# 반복되는 문자열 키 컬럼 (Arrow 캐시에는 딕셔너리 인코딩으로 보관하고, 요청 시 pandas categorical로 반환)
+CATEGORY_COLUMNS = (
+    "RES_ID", "RES_GROUP_ID", "ITEM_ID", "OPER_ID", "BUFFER_ID", "DEMAND_ID", "ALLOCATION_TYPE", "SHORT_REASON",
+)
+
+# pandas 3부터는 문자열 컬럼이 기본적으로 Arrow 기반(str)으로 변환됨
+_ARROW_STRING = None if int(pd.__version__.split(".")[0]) >= 3 else pd.StringDtype("pyarrow_numpy")
+
+
+# aggregate() 실행 중 읽은 테이블 이름 기록 (스레드별 스택, 중첩 집계는 바깥 집계에도 반영)
+_recording = threading.local()
+
+
+def _record(names):
+    stack = getattr(_recording, "stack", None)
+    if stack:
+        stack[-1].update(names)
+
+
+def _fingerprint(files, names):
+    # 멤버 지문 목록 (없는 파일은 None, 지문을 모르는 일반 경로가 있으면 공유하지 않음)
+    fingerprints = []
+    for name in sorted(names):
+        source = files.get(name)
+        fingerprint = getattr(source, "fingerprint", None)
+        if source is not None and fingerprint is None:
+            return None
+        fingerprints.append((name, fingerprint))
+    return tuple(fingerprints)
+
+
+class AggregateStore:
+    """업로드 간에 공유하는 집계 결과 저장소 ((집계 이름, 사용한 멤버 지문) 기준 LRU)
+
+    재업로드한 ZIP에서 집계가 읽는 멤버가 바뀌지 않았으면 이전 업로드의 결과를 그대로 사용한다.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self._dependencies = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, files):
+        """이전에 같은 멤버로 계산한 결과가 있으면 (결과, 사용한 테이블 이름), 없으면 None"""
+        with self._lock:
+            names = self._dependencies.get(key)
+            if names is None:
+                return None
+            fingerprint = _fingerprint(files, names)
+            if fingerprint is None or (key, fingerprint) not in self._results:
+                return None
+            self._results.move_to_end((key, fingerprint))
+            return self._results[(key, fingerprint)], names
+
+    def put(self, key, files, names, result):
+        with self._lock:
+            fingerprint = _fingerprint(files, names)
+            if fingerprint is None:
+                return
+            self._dependencies[key] = names
+            self._results[(key, fingerprint)] = result
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+
+def _types_mapper(arrow_type):
+    if _ARROW_STRING is not None and arrow_type in (pa.string(), pa.large_string()):
+        return _ARROW_STRING
+    return None
+
+
+def _open(source):
+    # ZIP 멤버는 메모리 버퍼/메모리 맵 뷰로, 일반 경로는 파일에서 바로 읽음
+    return source.open() if hasattr(source, "open") else source
+
+
+def _decode(source, columns=None):
+    # 반복 문자열 키 컬럼은 딕셔너리 인코딩 그대로 읽음 (문자열이 아닌 컬럼에는 적용되지 않음)
+    return pq.read_table(_open(source), columns=columns, read_dictionary=list(CATEGORY_COLUMNS))
+
+
+def _unique_strings(dictionaries):
+    # 딕셔너리 값들의 정렬된 합집합
+    if not dictionaries:
+        return pa.array([], type=pa.string())
+    values = pa.chunked_array([dictionary.cast(pa.string()) for dictionary in dictionaries], type=pa.string())
+    return pc.unique(values).drop_null().sort()
+
+
+def _decode_dictionary(column):
+    # 딕셔너리 인코딩 컬럼을 일반 문자열 컬럼으로 되돌림
+    return column.cast(column.type.value_type)
+
+
+def _encode_with(column, space):
+    # 청크별 딕셔너리 코드를 공용 카테고리 공간(space)의 코드로 바꿔 같은 딕셔너리를 공유
+    chunks = []
+    for chunk in column.chunks:
+        mapping = pc.index_in(chunk.dictionary.cast(space.type), value_set=space)
+        chunks.append(pa.DictionaryArray.from_arrays(pc.take(mapping, chunk.indices), space))
+    return pa.chunked_array(chunks, type=pa.dictionary(pa.int32(), space.type))
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    return function(*args), time.perf_counter() - started
+
+
+def _filter_columns(filters):
+    # [(col, op, val), ...] 또는 [[(col, op, val), ...], ...] 형태의 필터에서 컬럼명 추출
+    columns = []
+    for item in filters:
+        for col, _, _ in (item if isinstance(item, list) else [item]):
+            if col not in columns:
+                columns.append(col)
+    return columns
+
+
+def _needed_columns(columns, filters):
+    # 행 필터에 쓰는 컬럼까지 포함한 읽을 컬럼 목록 (None이면 전체)
+    if columns is None or not filters:
+        return columns
+    return list(columns) + [c for c in _filter_columns(filters) if c not in columns]
+
+
+class TableRegistry(Mapping):
+    """업로드 하나의 Parquet 테이블을 한 번만 디코딩하여 페이지에 나눠주는 레지스트리
+
+    파일명으로 존재 여부를 확인할 수 있고(`"RES_PLAN.parquet" in tables`),
+    load()로 필요한 컬럼과 행 필터를 지정하여 DataFrame을 받고, 여러 테이블은 load_many()로 동시에 받는다.
+    페이지는 읽는 테이블을 TABLES({파일명: load() 인자})로 선언하여 load(name, **TABLES[name])나 load_many(TABLES)로 읽는다.
+    페이지 집계 결과는 aggregate()로 업로드당 한 번만 계산하여 재사용한다.
+
+    파일마다 Arrow 테이블 하나만 캐시하며, 처음 디코딩할 때 declare()로 등록된 컬럼(모든 페이지 TABLES의 합집합)을
+    한 번에 읽고 행 필터는 그 테이블에 메모리에서 적용한다. 등록되지 않은 컬럼만 나중에 덧붙여 읽는다.
+
+    CATEGORY_COLUMNS는 딕셔너리 인코딩으로 보관하며, load(categorical=True)로 요청하면
+    업로드에서 지금까지 읽은 테이블이 공유하는 카테고리 공간의 pandas categorical로 반환한다.
+
+    shared_aggregates(AggregateStore)를 주면 집계 결과를 사용한 멤버의 지문 기준으로 업로드 간에 공유하고,
+    sidecar(SidecarStore)를 주면 집계 결과를 디스크에 기록하여 서버를 다시 시작해도 다시 계산하지 않는다.
+    """
+
+    def __init__(self, found_files, on_decode=None, shared_aggregates=None, sidecar=None):
+        self._files = dict(found_files)
+        self._declared = {}
+        self._tables = {}
+        self._complete = set()
+        self._spilled = set()
+        self._spill_bytes = 0
+        self._aggregates = {}
+        self._lock = threading.RLock()
+        self._decode_locks = defaultdict(threading.Lock)
+        self._aggregate_locks = defaultdict(threading.Lock)
+        self._categories = {}
+        self._category_locks = defaultdict(threading.Lock)
+        self._on_decode = on_decode
+        self._shared_aggregates = shared_aggregates
+        self._sidecar = sidecar
+        self.hits = 0
+        self.misses = 0
+        self.reused_aggregates = 0
+        self.stored_aggregates = 0
+        self.load_times = {}
+
+    def __getitem__(self, name):
+        return self._files[name]
+
+    def __contains__(self, name):
+        # 파일 존재 여부도 집계 결과에 영향을 주므로 집계가 사용한 이름으로 기록
+        _record([name])
+        return name in self._files
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __len__(self):
+        return len(self._files)
+
+    @property
+    def nbytes(self):
+        """메모리에 올라와 있는 테이블 크기 (디스크로 내린 메모리 맵 테이블은 제외)"""
+        with self._lock:
+            return sum(table.nbytes for name, table in self._tables.items() if name not in self._spilled)
+
+    def memory_tables(self):
+        """메모리에 올라와 있는 테이블의 {id: 크기} (업로드 간에 공유된 테이블을 한 번만 세기 위해 사용)"""
+        with self._lock:
+            return {id(table): table.nbytes for name, table in self._tables.items() if name not in self._spilled}
+
+    def adopt(self, other):
+        """지문이 같은 멤버의 디코딩된 테이블을 다른 레지스트리에서 가져오는 함수 (바뀌지 않은 멤버는 다시 디코딩하지 않음)"""
+        with other._lock:
+            cached = [
+                (name, table, name in other._complete, name in other._spilled) for name, table in other._tables.items()
+            ]
+        for name, table, complete, spilled in cached:
+            fingerprint = getattr(self._files.get(name), "fingerprint", None)
+            if fingerprint is None or getattr(other._files.get(name), "fingerprint", None) != fingerprint:
+                continue
+            with self._lock:
+                if name in self._tables:
+                    continue
+                self._tables[name] = table
+                if complete:
+                    self._complete.add(name)
+                if spilled:
+                    self._spilled.add(name)
+
+    @property
+    def spilled_bytes(self):
+        """디스크로 내린 Arrow IPC 파일 크기"""
+        with self._lock:
+            return self._spill_bytes
+
+    def clear(self):
+        """디코딩된 테이블과 집계 결과 해제"""
+        with self._lock:
+            self._tables.clear()
+            self._complete.clear()
+            self._spilled.clear()
+            self._aggregates.clear()
+            self._categories.clear()
+
+    def spill(self, directory):
+        """디코딩된 테이블을 Arrow IPC 파일로 내리고 메모리 맵 테이블로 바꾸는 함수 (메모리 예산 초과 시 호출)
+
+        테이블은 변경되지 않으므로 같은 업로드를 보는 세션은 계속 같은 테이블을 공유하고,
+        이후 조회는 Parquet을 다시 디코딩하지 않고 파일에서 바로 읽는다.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            pending = [name for name in self._tables if name not in self._spilled]
+
+        for name in pending:
+            with self._lock:
+                decode_lock = self._decode_locks[name]
+            with decode_lock:
+                with self._lock:
+                    table = self._tables.get(name)
+                if table is None or name in self._spilled:
+                    continue
+
+                # 메모리 맵으로 열려 있는 이전 파일을 덮어쓰지 않도록 매번 새 파일에 기록
+                # IPC 파일은 컬럼당 딕셔너리 하나만 허용하므로 청크별 딕셔너리를 합쳐서 기록
+                fd, path = tempfile.mkstemp(prefix=f"{name}.", suffix=".arrow", dir=directory)
+                with os.fdopen(fd, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table.unify_dictionaries())
+                mapped = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+                with self._lock:
+                    self._tables[name] = mapped
+                    self._spilled.add(name)
+                    self._spill_bytes += os.path.getsize(path)
+
+    def declare(self, tables):
+        """페이지가 읽는 테이블과 컬럼을 등록하는 함수 (페이지의 TABLES 형식)
+
+        처음 디코딩할 때 등록된 컬럼의 합집합을 한 번에 읽으므로 페이지마다 같은 파일을 다시 디코딩하지 않는다.
+        """
+        with self._lock:
+            for name, spec in tables.items():
+                needed = _needed_columns(spec.get("columns"), spec.get("filters"))
+                declared = self._declared.get(name, [])
+                if needed is None or declared is None:
+                    self._declared[name] = None
+                else:
+                    self._declared[name] = declared + [c for c in needed if c not in declared]
+
+    def load(self, name, columns=None, filters=None, categorical=False):
+        """테이블을 읽기 전용 DataFrame으로 반환하는 함수
+
+        columns: 사용할 컬럼 목록 (None이면 전체)
+        filters: pyarrow 행 필터 (예: [("ALLOCATION_TYPE", "==", "Setup")])
+        categorical: True이면 CATEGORY_COLUMNS를 업로드 공용 카테고리의 categorical로 반환
+        """
+        _record([name])
+        table, seconds = _timed(self._prepare, name, columns, filters)
+        if categorical:
+            self._extend_categories([table])
+        df, convert_seconds = _timed(self._to_pandas, table, categorical)
+        with self._lock:
+            self.load_times[name] = seconds + convert_seconds
+        return df
+
+    def load_many(self, tables):
+        """여러 테이블을 스레드 풀에서 동시에 읽어 {파일명: DataFrame}으로 반환하는 함수
+
+        tables: {파일명: {"columns": ..., "filters": ..., "categorical": ...}} (페이지의 TABLES 형식)
+        categorical 테이블은 모두 읽은 뒤 카테고리 공간을 한 번에 넓혀 함께 읽은 테이블끼리 같은 카테고리를 사용한다.
+        """
+        _record(tables)
+        futures = {
+            name: _load_pool.submit(_timed, self._prepare, name, spec.get("columns"), spec.get("filters"))
+            for name, spec in tables.items()
+        }
+        prepared = {name: future.result() for name, future in futures.items()}
+        self._extend_categories([prepared[name][0] for name, spec in tables.items() if spec.get("categorical")])
+
+        futures = {
+            name: _load_pool.submit(_timed, self._to_pandas, prepared[name][0], spec.get("categorical", False))
+            for name, spec in tables.items()
+        }
+        frames = {}
+        for name, future in futures.items():
+            frames[name], convert_seconds = future.result()
+            with self._lock:
+                self.load_times[name] = prepared[name][1] + convert_seconds
+        return frames
+
+    def aggregate(self, key, build):
+        """페이지 집계 결과를 업로드당 한 번만 계산하여 반환하는 함수
+
+        key: 집계 결과 이름 (예: "equipment_detail.group_index")
+        build: 레지스트리를 받아 집계 결과를 만드는 함수
+
+        계산 중 읽은 테이블(포함 여부 확인 포함)을 기록해 두고, 재업로드한 ZIP에서
+        그 멤버들의 지문(CRC32, 크기)이 같으면 이전 업로드의 결과를 그대로 사용한다.
+        메모리에 없으면 디스크에 저장된 같은 ZIP의 결과를 읽고, 그것도 없을 때만 계산한다.
+        """
+        with self._lock:
+            aggregate_lock = self._aggregate_locks[key]
+
+        with aggregate_lock:
+            with self._lock:
+                cached = self._aggregates.get(key)
+            if cached is None and self._shared_aggregates is not None:
+                cached = self._shared_aggregates.get(key, self._files)
+                if cached is not None:
+                    with self._lock:
+                        self._aggregates[key] = cached
+                        self.reused_aggregates += 1
+            if cached is None and self._sidecar is not None:
+                cached = self._sidecar.get(key, build)
+                if cached is not None:
+                    with self._lock:
+                        self._aggregates[key] = cached
+                        self.stored_aggregates += 1
+                    if self._shared_aggregates is not None:
+                        result, names = cached
+                        self._shared_aggregates.put(key, self._files, names, result)
+            if cached is not None:
+                result, names = cached
+                _record(names)
+                return result
+
+            if not hasattr(_recording, "stack"):
+                _recording.stack = []
+            _recording.stack.append(set())
+            try:
+                result = build(self)
+            finally:
+                names = frozenset(_recording.stack.pop())
+            _record(names)
+
+            with self._lock:
+                self._aggregates[key] = (result, names)
+            if self._shared_aggregates is not None:
+                self._shared_aggregates.put(key, self._files, names, result)
+            if self._sidecar is not None:
+                self._sidecar.put(key, build, result, names)
+        return result
+
+    def _prepare(self, name, columns, filters):
+        # 필요한 컬럼과 행 필터를 적용한 Arrow 테이블 (딕셔너리 인코딩 컬럼은 그대로)
+        table = self._table(name, _needed_columns(columns, filters))
+        if filters:
+            table = table.filter(pq.filters_to_expression(filters))
+        if columns is not None:
+            table = table.select(list(columns))
+        return table
+
+    def _to_pandas(self, table, categorical):
+        for i, field in enumerate(table.schema):
+            if not pa.types.is_dictionary(field.type):
+                continue
+            if categorical:
+                with self._lock:
+                    space = self._categories[field.name]
+                column = _encode_with(table.column(i), space)
+            else:
+                column = _decode_dictionary(table.column(i))
+            table = table.set_column(i, field.with_type(column.type), column)
+        return table.to_pandas(split_blocks=True, types_mapper=_types_mapper)
+
+    def _extend_categories(self, tables):
+        """tables의 딕셔너리 컬럼 값이 모두 들어가도록 컬럼별 공용 카테고리 공간을 넓히는 함수
+
+        카테고리 공간은 업로드에서 지금까지 디코딩한 테이블 값의 정렬된 합집합이며 새 값이 나올 때만 넓어진다.
+        파일을 새로 읽지 않으므로 요청하지 않은 멤버는 열지 않고, 먼저 받은 DataFrame의 카테고리는 넓어진 공간의 부분집합이다.
+        """
+        dictionaries = defaultdict(list)
+        for table in tables:
+            for field, column in zip(table.schema, table.columns):
+                if pa.types.is_dictionary(field.type):
+                    dictionaries[field.name].extend(chunk.dictionary for chunk in column.chunks)
+
+        for column, values in dictionaries.items():
+            with self._lock:
+                category_lock = self._category_locks[column]
+            with category_lock:
+                with self._lock:
+                    space = self._categories.get(column)
+                    cached = [table.column(column) for table in self._tables.values() if column in table.column_names]
+                if space is not None and pc.all(pc.is_in(_unique_strings(values), value_set=space)).as_py():
+                    continue
+
+                # 새 값이 있으면 이미 디코딩한 다른 테이블의 값까지 합쳐 한 번에 넓힘
+                for chunked in cached:
+                    if pa.types.is_dictionary(chunked.type):
+                        values.extend(chunk.dictionary for chunk in chunked.chunks)
+                if space is not None:
+                    values.append(space)
+                space = _unique_strings(values)
+                with self._lock:
+                    self._categories[column] = space
+
+    def _lookup(self, name, columns):
+        # 캐시된 테이블에 필요한 컬럼이 모두 있으면 반환 (self._lock 안에서 호출)
+        table = self._tables.get(name)
+        if name in self._complete or (
+            table is not None and columns is not None and all(c in table.column_names for c in columns)
+        ):
+            return table
+        return None
+
+    def _table(self, name, columns):
+        with self._lock:
+            table = self._lookup(name, columns)
+            if table is not None:
+                self.hits += 1
+                return table
+            decode_lock = self._decode_locks[name]
+
+        # 같은 테이블은 한 번에 한 스레드만 디코딩하고, 다른 테이블은 동시에 디코딩 가능
+        with decode_lock:
+            with self._lock:
+                table = self._lookup(name, columns)
+                if table is not None:
+                    self.hits += 1
+                    return table
+                self.misses += 1
+                table = self._tables.get(name)
+                # 요청한 컬럼에 등록된 컬럼을 더해 다른 페이지가 읽을 컬럼도 함께 디코딩
+                declared = self._declared.get(name, [])
+                if columns is not None and declared is not None:
+                    columns = declared + [c for c in columns if c not in declared]
+                else:
+                    columns = None
+
+            source = self._files[name]
+            if table is None or columns is None:
+                # 전체 컬럼 요청이면 한 번만 전체를 디코딩
+                table = _decode(source, columns)
+            else:
+                # 아직 디코딩하지 않은 컬럼만 읽어 기존 테이블에 덧붙임
+                missing = [c for c in columns if c not in table.column_names]
+                decoded = _decode(source, missing)
+                for field, column in zip(decoded.schema, decoded.columns):
+                    table = table.append_column(field, column)
+
+            with self._lock:
+                self._tables[name] = table
+                # 컬럼을 덧붙인 테이블은 다시 메모리 사용량에 포함 (이전 파일은 업로드 항목과 함께 삭제)
+                self._spilled.discard(name)
+                if columns is None:
+                    self._complete.add(name)
+
+        if self._on_decode is not None:
+            self._on_decode()
+        return table
@@ -0,0 +1,58 @@
+import pandas as pd
+
+# 집계 단위 (일/주/월)
+FREQUENCIES = ("daily", "weekly", "monthly")
+
+
+def floor_days(days, freq):
+    """datetime64[D] 배열을 일/주(월요일 시작)/월 시작일로 내림하는 함수"""
+    if freq == "weekly":
+        # 1970-01-01은 목요일이므로 (일수 + 3) % 7 이 월요일 기준 요일 번호
+        weekday = (days.astype("int64") + 3) % 7
+        return days - weekday.astype("timedelta64[D]")
+    if freq == "monthly":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    return days
+
+
+def time_rollup(df, date_col, value_col, by=None):
+    """날짜 컬럼 기준 일/주/월별 합계와 누적 합계를 한 번에 계산하는 함수
+
+    원본 행은 일 단위 집계에서 한 번만 훑고, 주/월 집계는 일 단위 결과를 다시 묶어 계산한다.
+    by를 주면 해당 컬럼별로 따로 집계하고 누적 합계도 그룹별로 계산한다.
+
+    반환값: {"daily": ..., "weekly": ..., "monthly": ...}
+    각 DataFrame의 컬럼은 [*by, "PERIOD_START", value_col, "CUM_" + value_col] 이며
+    PERIOD_START는 datetime64[ns] (주는 월요일, 월은 1일)이다.
+    """
+    by = list(by or [])
+    cum_col = f"CUM_{value_col}"
+
+    # 날짜가 없는 행은 제외하고 일 단위로 내림 (datetime64 정수 연산)
+    dates = pd.to_datetime(df[date_col])
+    valid = dates.notna().to_numpy()
+    days = dates.to_numpy(dtype="datetime64[ns]")[valid].astype("datetime64[D]")
+
+    base = pd.DataFrame({col: df[col].to_numpy()[valid] for col in by})
+    base[value_col] = df[value_col].to_numpy()[valid]
+
+    result = {}
+    daily = None
+    for freq in FREQUENCIES:
+        if daily is None:
+            frame = base.assign(PERIOD_START=days)
+        else:
+            frame = daily.assign(
+                PERIOD_START=floor_days(daily["PERIOD_START"].to_numpy(dtype="datetime64[D]"), freq)
+            )
+        grouped = frame.groupby(by + ["PERIOD_START"], as_index=False)[value_col].sum()
+        grouped["PERIOD_START"] = grouped["PERIOD_START"].astype("datetime64[ns]")
+        if daily is None:
+            daily = grouped
+
+        if by:
+            grouped[cum_col] = grouped.groupby(by)[value_col].cumsum()
+        else:
+            grouped[cum_col] = grouped[value_col].cumsum()
+        result[freq] = grouped[by + ["PERIOD_START", value_col, cum_col]]
+    return result
@@ -0,0 +1,209 @@
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import Counter, OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from utils.page_warmup import PageWarmup
+from utils.sidecar_store import SidecarStore
+from utils.table_registry import AggregateStore, TableRegistry
+from utils.zip_reader import index_parquet_members
+
+# 캐시 예산 설정 (환경 변수로 조정 가능, MB 단위)
+MEMORY_BUDGET_MB = int(os.environ.get("UPLOAD_CACHE_MEMORY_MB", "2048"))
+DISK_BUDGET_MB = int(os.environ.get("UPLOAD_CACHE_DISK_MB", "8192"))
+CACHE_DIR = os.environ.get(
+    "UPLOAD_CACHE_DIR", os.path.join(tempfile.gettempdir(), "streamlit_upload_cache")
+)
+
+# 집계 결과 저장소 (서버를 다시 시작해도 유지되므로 CACHE_DIR과 다른 폴더 사용)
+SIDECAR_BUDGET_MB = int(os.environ.get("UPLOAD_SIDECAR_DISK_MB", "1024"))
+SIDECAR_DIR = os.environ.get(
+    "UPLOAD_SIDECAR_DIR", os.path.join(tempfile.gettempdir(), "streamlit_aggregate_store")
+)
+
+# 페이지에서 컬럼을 수정해도 캐시된 테이블에 영향이 없도록 Copy-on-Write 사용 (pandas 3부터는 기본값)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+class UploadEntry:
+    """업로드된 ZIP 하나에 대한 캐시 항목 (ZIP 원본, 멤버 색인과 테이블 레지스트리 보관)"""
+
+    def __init__(self, digest, root, archive, on_decode=None, shared_aggregates=None, sidecar=None):
+        self.digest = digest
+        self.root = root
+        self.archive = archive
+        self.found_files = index_parquet_members(archive)
+        self.registry = TableRegistry(
+            self.found_files, on_decode=on_decode, shared_aggregates=shared_aggregates, sidecar=sidecar
+        )
+        self.archive_bytes = os.path.getsize(archive)
+        self._warmup = None
+        self._warmup_lock = threading.Lock()
+
+    def warmup(self, pages):
+        """모든 페이지 집계를 백그라운드에서 미리 계산하는 작업 (항목당 한 번만 시작하여 세션 간 공유)"""
+        with self._warmup_lock:
+            if self._warmup is None:
+                self._warmup = PageWarmup(self.registry, pages)
+            return self._warmup
+
+    @property
+    def disk_bytes(self):
+        return self.archive_bytes + self.registry.spilled_bytes
+
+    def spill_tables(self):
+        # 디코딩된 테이블을 Arrow IPC 파일로 내려 메모리에서 해제 (다시 디코딩하지 않고 메모리 맵으로 사용)
+        self.registry.spill(os.path.join(self.root, "tables"))
+
+    def remove(self):
+        with self._warmup_lock:
+            if self._warmup is not None:
+                self._warmup.cancel()
+        self.registry.clear()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class UploadLease:
+    """세션이 사용 중인 업로드 항목 표시 (세션 상태와 함께 해제되면 참조 수 감소)"""
+
+    def __init__(self, digest):
+        self.digest = digest
+
+
+class UploadCache:
+    """SHA-256 기준으로 업로드된 ZIP과 파싱된 테이블을 보관하는 프로세스 공용 LRU 캐시
+
+    같은 ZIP을 여는 세션은 같은 항목(같은 Arrow 테이블)을 공유하며, 세션별 참조 수를 관리한다.
+    메모리 예산을 넘으면 오래된 항목의 테이블부터 Arrow IPC 파일로 내리고,
+    디스크 예산을 넘으면 사용 중인 세션이 없는 오래된 항목부터 삭제한다.
+    재업로드한 ZIP은 멤버 지문(CRC32, 크기)이 같은 테이블과 집계 결과를 이전 항목에서 이어받는다.
+    sidecar_root를 주면 집계 결과를 ZIP별로 디스크에 남겨 서버를 다시 시작한 뒤에도 사용한다.
+    """
+
+    def __init__(self, root, memory_budget, disk_budget, sidecar_root=None, sidecar_budget=0):
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.sidecar_root = sidecar_root
+        self.sidecar_budget = sidecar_budget
+        self._entries = OrderedDict()
+        self._refs = Counter()
+        self._aggregates = AggregateStore()
+        self._lock = threading.RLock()
+
+        # 같은 CACHE_DIR을 쓰는 다른 프로세스(또는 이전 캐시 인스턴스)의 파일을 지우지 않도록
+        # 인스턴스마다 별도 폴더를 만들고, 프로세스가 끝날 때 이 폴더만 정리
+        os.makedirs(root, exist_ok=True)
+        self.root = tempfile.mkdtemp(prefix=f"{os.getpid()}.", dir=root)
+        atexit.register(shutil.rmtree, self.root, ignore_errors=True)
+
+    def get_or_store(self, data, digest=None):
+        """ZIP 바이트에 해당하는 캐시 항목을 반환하고, 없으면 저장하여 등록"""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                return entry
+
+            # 멤버를 추출하지 않고 ZIP 원본만 한 번 저장 (Parquet 멤버는 ZIP에서 바로 읽음)
+            # 임시 파일에 쓴 뒤 이름을 바꿔 반쯤 쓰인 파일이 노출되지 않도록 함
+            target = os.path.join(self.root, digest)
+            os.makedirs(target, exist_ok=True)
+            archive = os.path.join(target, "archive.zip")
+            fd, staging = tempfile.mkstemp(dir=target)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(staging, archive)
+
+            sidecar = None
+            if self.sidecar_root is not None:
+                sidecar = SidecarStore(self.sidecar_root, digest, self.sidecar_budget)
+            entry = UploadEntry(
+                digest, target, archive, on_decode=lambda: self._touch(digest),
+                shared_aggregates=self._aggregates, sidecar=sidecar,
+            )
+            # 최근 항목부터 지문이 같은 멤버의 디코딩된 테이블을 이어받음
+            for other in reversed(self._entries.values()):
+                entry.registry.adopt(other.registry)
+            self._entries[digest] = entry
+            self._evict(keep=digest)
+            return entry
+
+    def acquire(self, digest):
+        """세션이 digest 항목을 사용하기 시작할 때 호출 (반환된 lease가 해제되면 참조 수 감소)"""
+        lease = UploadLease(digest)
+        with self._lock:
+            self._refs[digest] += 1
+        weakref.finalize(lease, self._release, digest)
+        return lease
+
+    def _release(self, digest):
+        with self._lock:
+            self._refs[digest] -= 1
+            if self._refs[digest] <= 0:
+                del self._refs[digest]
+
+    def _touch(self, digest):
+        # 테이블이 새로 디코딩되면 최근 사용으로 표시하고 메모리 예산 확인
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                self._evict(keep=digest)
+
+    def _memory_bytes(self):
+        # 여러 항목이 공유하는 테이블은 한 번만 계산
+        tables = {}
+        for entry in self._entries.values():
+            tables.update(entry.registry.memory_tables())
+        return sum(tables.values())
+
+    def _evict(self, keep):
+        # 메모리 예산 초과 시 사용 중인 세션이 없는 항목부터, 오래된 순서로 테이블을 디스크로 내림
+        # (내린 테이블은 메모리 맵으로 계속 사용할 수 있으므로 방금 사용한 항목도 마지막에 포함)
+        lru = sorted(self._entries, key=lambda digest: (digest == keep, self._refs[digest] > 0))
+        for digest in lru:
+            if self._memory_bytes() <= self.memory_budget:
+                break
+            self._entries[digest].spill_tables()
+
+        # 디스크 예산 초과 시 사용 중인 세션이 없는 오래된 항목 삭제
+        for digest in list(self._entries):
+            if sum(e.disk_bytes for e in self._entries.values()) <= self.disk_budget:
+                break
+            if digest != keep and self._refs[digest] <= 0:
+                self._entries.pop(digest).remove()
+
+
+@st.cache_resource
+def get_upload_cache():
+    return UploadCache(
+        CACHE_DIR, MEMORY_BUDGET_MB * 1024 ** 2, DISK_BUDGET_MB * 1024 ** 2,
+        sidecar_root=SIDECAR_DIR, sidecar_budget=SIDECAR_BUDGET_MB * 1024 ** 2,
+    )
+
+
+def load_uploaded_zip(uploaded_file):
+    """업로드된 ZIP 파일의 캐시 항목을 반환하는 함수 (재실행 시 해시 재계산 생략)"""
+    digest_key = f"upload_digest_{getattr(uploaded_file, 'file_id', uploaded_file.name)}"
+    data = uploaded_file.getvalue()
+    if digest_key not in st.session_state:
+        st.session_state[digest_key] = hashlib.sha256(data).hexdigest()
+    digest = st.session_state[digest_key]
+
+    cache = get_upload_cache()
+    entry = cache.get_or_store(data, digest)
+
+    # 세션이 보고 있는 업로드를 참조로 등록 (다른 ZIP으로 바꾸거나 세션이 끝나면 이전 참조 해제)
+    lease = st.session_state.get("upload_lease")
+    if lease is None or lease.digest != digest:
+        st.session_state["upload_lease"] = cache.acquire(digest)
+    return entry
+
@@ -0,0 +1,252 @@
+from datetime import datetime, time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+# 두 재공 페이지가 build_wip에서 함께 읽는 테이블 (같은 카테고리 공간을 쓰도록 load_many()로 읽음)
+TABLES = {
+    # LOT_ID는 시점별 재공 계산(TIMELINE_TABLE)에서만 쓰지만 LOT_HISTORY를 한 번에 디코딩하도록 함께 등록
+    "LOT_HISTORY.parquet": {
+        "columns": ["LOT_ID", "DEMAND_ID", "EVENT_TYPE", "EVENT_DATETIME", "ITEM_ID", "BUFFER_ID", "OPER_ID", "LOT_QTY"],
+        "filters": [("EVENT_TYPE", "==", "Creation")],
+        "categorical": True,
+    },
+    "RES_PLAN.parquet": {
+        "columns": ["DEMAND_ID", "PLAN_DATE", "ITEM_ID", "BUFFER_ID", "OPER_ID", "PLAN_QTY"],
+        "categorical": True,
+    },
+}
+
+# 시점별 재공 계산에 사용하는 LOT_HISTORY 컬럼 (EVENT_TYPE 필터 없이 전체 이벤트 사용)
+TIMELINE_TABLE = {
+    "columns": ["LOT_ID", "DEMAND_ID", "EVENT_TYPE", "EVENT_DATETIME", "BUFFER_ID", "OPER_ID", "LOT_QTY"],
+    "categorical": True,
+}
+
+# 재공을 나눠 보는 기준 컬럼 (BUFFER_ID별, OPER_ID별)
+WIP_KEYS = ("BUFFER_ID", "OPER_ID")
+
+# 대기 상태가 아닌 이벤트 (가공 중이거나 출하/종료된 LOT)
+# 그 외 이벤트 이후에는 LOT의 다음 이벤트까지 해당 BUFFER_ID/OPER_ID에서 대기하는 것으로 본다
+NON_WAITING_EVENTS = ("TrackIn", "Ship", "Terminate")
+
+
+def _daily_sum(df, date_col, value_col):
+    # SafetyStock 수요를 제외하고 (날짜, ITEM_ID, BUFFER_ID, OPER_ID)별로 한 번만 합산
+    df = df[~df["DEMAND_ID"].str.startswith("SafetyStock", na=False)]
+    dates = pd.to_datetime(df[date_col]).dt.normalize()
+    keys = [dates.rename(date_col)] + [df[col] for col in ("ITEM_ID",) + WIP_KEYS]
+    return df[value_col].groupby(keys, dropna=False, observed=True).sum().reset_index()
+
+
+def _breakdown(lot_daily, plan_daily, key):
+    # 한 번 합산한 일별 결과를 key 기준으로 다시 묶어 LOT_QTY - PLAN_QTY 계산
+    lot_grouped = lot_daily.groupby(["EVENT_DATETIME", "ITEM_ID", key], observed=True)["LOT_QTY"].sum().reset_index()
+    res_grouped = plan_daily.groupby(["PLAN_DATE", "ITEM_ID", key], observed=True)["PLAN_QTY"].sum().reset_index()
+
+    merged = pd.merge(lot_grouped, res_grouped, left_on=["EVENT_DATETIME", "ITEM_ID", key],
+                      right_on=["PLAN_DATE", "ITEM_ID", key], how="left")
+    merged[["LOT_QTY", "PLAN_QTY"]] = merged[["LOT_QTY", "PLAN_QTY"]].fillna(0)
+    merged["WAITING_WIP_QTY"] = merged["LOT_QTY"] - merged["PLAN_QTY"]
+    grouped = merged.groupby(["EVENT_DATETIME", key], observed=True)[["WAITING_WIP_QTY"]].sum().reset_index()
+
+    # 화면 표시용 날짜 컬럼은 집계가 끝난 작은 결과에서만 date로 변환
+    lot_grouped["EVENT_DATETIME"] = lot_grouped["EVENT_DATETIME"].dt.date
+    res_grouped["PLAN_DATE"] = res_grouped["PLAN_DATE"].dt.date
+    grouped["EVENT_DATETIME"] = grouped["EVENT_DATETIME"].dt.date
+    return {"lot": lot_grouped, "plan": res_grouped, "wip": grouped}
+
+
+def build_wip(tables):
+    """BUFFER_ID별/OPER_ID별 일별 재공 수량을 한 번의 집계로 계산하는 함수
+
+    원본 행은 (날짜, ITEM_ID, BUFFER_ID, OPER_ID) 단위 합산에서 한 번만 훑고,
+    기준별 결과는 이 일별 합계를 다시 묶어 만든다.
+
+    반환값: {"BUFFER_ID": {...}, "OPER_ID": {...}}
+    각 항목은 {"lot": 일별 LOT_QTY, "plan": 일별 PLAN_QTY, "wip": 일별 잔여 재공 수량} 이다.
+    """
+    # 두 테이블을 함께 읽어 같은 카테고리 공간을 사용 (ITEM_ID/BUFFER_ID/OPER_ID 병합을 정수 코드로 수행)
+    loaded = tables.load_many(TABLES)
+    lot_history = loaded["LOT_HISTORY.parquet"]
+    res_plan = loaded["RES_PLAN.parquet"]
+
+    lot_daily = _daily_sum(lot_history, "EVENT_DATETIME", "LOT_QTY")
+    plan_daily = _daily_sum(res_plan, "PLAN_DATE", "PLAN_QTY")
+    return {key: _breakdown(lot_daily, plan_daily, key) for key in WIP_KEYS}
+
+
+class WipTimeline:
+    """key별 대기 재공 수량의 계단 함수 (이벤트 시각별 대기 수량을 key 순서로 이어 붙인 배열)
+
+    times/levels의 offsets[i]:offsets[i + 1] 구간이 labels[i]의 시각(ns)과 그 시각 이후 대기 수량이다.
+    """
+
+    def __init__(self, key, labels, offsets, times, levels):
+        self.key = key
+        self.labels = labels
+        self.offsets = offsets
+        self.times = times
+        self.levels = levels
+
+    @property
+    def span(self):
+        """첫 이벤트와 마지막 이벤트 시각"""
+        if len(self.times) == 0:
+            return None
+        return pd.Timestamp(self.times.min()), pd.Timestamp(self.times.max())
+
+    def _sample(self, points):
+        # key별 구간에서 이진 탐색으로 각 시각 직전(포함) 이벤트의 대기 수량 조회
+        values = np.zeros((len(self.labels), len(points)))
+        for i in range(len(self.labels)):
+            start, end = self.offsets[i], self.offsets[i + 1]
+            if start == end:
+                # 대기 이벤트가 없는 key (TrackIn/Ship 등에서만 나온 경우)는 항상 0
+                continue
+            pos = np.searchsorted(self.times[start:end], points, side="right") - 1
+            values[i] = np.where(pos >= 0, self.levels[start + np.maximum(pos, 0)], 0)
+        return values
+
+    def at(self, timestamp):
+        """timestamp 시점의 key별 대기 재공 수량 (key당 O(log n))"""
+        point = np.array([pd.Timestamp(timestamp).to_datetime64()], dtype="datetime64[ns]").view("int64")
+        values = self._sample(point)[:, 0]
+        result = pd.DataFrame({self.key: self.labels, "WAITING_WIP_QTY": values})
+        return result[result["WAITING_WIP_QTY"] != 0].reset_index(drop=True)
+
+    def series(self, step, origin=pd.Timedelta(0)):
+        """origin(자정 기준 오프셋)부터 step 간격 시각마다의 key별 대기 재공 수량"""
+        if self.span is None:
+            return pd.DataFrame(columns=["DATETIME", self.key, "WAITING_WIP_QTY"])
+        first, last = self.span
+        start = (first - origin).floor(step) + origin
+        grid = pd.date_range(start, last, freq=step)
+        values = self._sample(grid.to_numpy(dtype="datetime64[ns]").view("int64"))
+        return pd.DataFrame({
+            "DATETIME": np.tile(grid, len(self.labels)),
+            self.key: np.repeat(self.labels, len(grid)),
+            "WAITING_WIP_QTY": values.ravel(),
+        })
+
+
+def _sweep(key, codes, labels, starts, ends, qty):
+    # 대기 시작(+수량)과 종료(-수량) 이벤트를 (key, 시각) 순으로 한 번 정렬하여 key별 누적합 계산
+    has_end = ends >= 0
+    times = np.concatenate([starts, ends[has_end]])
+    keys = np.concatenate([codes, codes[has_end]])
+    deltas = np.concatenate([qty, -qty[has_end]])
+
+    order = np.lexsort((times, keys))
+    times, keys, deltas = times[order], keys[order], deltas[order]
+    levels = pd.Series(deltas).groupby(keys, sort=False).cumsum().to_numpy()
+
+    # 같은 시각의 이벤트는 마지막 누적값만 남김
+    last = np.ones(len(times), dtype=bool)
+    last[:-1] = (keys[1:] != keys[:-1]) | (times[1:] != times[:-1])
+    times, keys, levels = times[last], keys[last], levels[last]
+
+    offsets = np.searchsorted(keys, np.arange(len(labels) + 1))
+    return WipTimeline(key, labels, offsets, times, levels)
+
+
+def build_wip_timeline(tables):
+    """LOT_HISTORY 전체 이벤트를 한 번 정렬·스윕하여 BUFFER_ID별/OPER_ID별 대기 재공 계단 함수를 만드는 함수
+
+    LOT은 대기 이벤트 시각부터 같은 LOT의 다음 이벤트 시각까지 해당 BUFFER_ID/OPER_ID에서 대기한다.
+    반환값: {"BUFFER_ID": WipTimeline, "OPER_ID": WipTimeline}
+    """
+    events = tables.load("LOT_HISTORY.parquet", **TIMELINE_TABLE)
+    events = events[~events["DEMAND_ID"].str.startswith("SafetyStock", na=False)]
+    event_times = pd.to_datetime(events["EVENT_DATETIME"])
+    events = events[event_times.notna().to_numpy()]
+    times = event_times.dropna().to_numpy(dtype="datetime64[ns]").view("int64")
+
+    # LOT별 시각 순으로 정렬하여 각 이벤트의 다음 이벤트 시각(같은 LOT) 계산
+    lots, _ = pd.factorize(events["LOT_ID"])
+    order = np.lexsort((times, lots))
+    lots, times = lots[order], times[order]
+    events = events.iloc[order]
+    ends = np.full(len(times), -1, dtype="int64")
+    same_lot = (lots[1:] == lots[:-1]) & (lots[1:] >= 0)
+    ends[:-1][same_lot] = times[1:][same_lot]
+
+    waiting = ~events["EVENT_TYPE"].isin(NON_WAITING_EVENTS).to_numpy()
+    qty = events["LOT_QTY"].fillna(0).to_numpy(dtype=float)
+
+    timelines = {}
+    for key in WIP_KEYS:
+        codes, labels = pd.factorize(events[key])
+        mask = waiting & (codes >= 0)
+        timelines[key] = _sweep(key, codes[mask], np.asarray(labels), times[mask], ends[mask], qty[mask])
+    return timelines
+
+
+def factory_shift(tables):
+    """FACTORY_CONFIG의 FACTORY_START_TIME과 SHIFT_NAME 개수로 (교대 시작 오프셋, 교대 길이)를 구하는 함수"""
+    if "FACTORY_CONFIG.parquet" not in tables:
+        return None
+    con = tables.load("FACTORY_CONFIG.parquet", columns=["FACTORY_START_TIME", "SHIFT_NAME"])
+    if con.empty:
+        return None
+    start = pd.to_datetime(con["FACTORY_START_TIME"].iloc[0], format="%H:%M:%S", errors="coerce")
+    shift_names = str(con["SHIFT_NAME"].iloc[0]).replace(" ", "").split(",")
+    if pd.isnull(start):
+        return None
+    origin = pd.Timedelta(hours=start.hour, minutes=start.minute, seconds=start.second)
+    return origin, pd.Timedelta(hours=24) / len(shift_names)
+
+
+# 두 재공 페이지가 공유하는 집계
+AGGREGATES = {"wip.daily": build_wip, "wip.timeline": build_wip_timeline, "wip.factory_shift": factory_shift}
+
+
+@st.fragment
+def show_wip_timeline(timeline, shift):
+    """LOT_HISTORY 이벤트 기준 시점별 대기 재공 조회 (단위/시점 변경 시 이 부분만 다시 실행)"""
+    key = timeline.key
+    st.subheader(f"⏱ {key}별 시점별 대기 재공 수량 (LOT_HISTORY 전체 이벤트 기준)")
+    if timeline.span is None:
+        st.info("LOT_HISTORY에 대기 이벤트가 없습니다.")
+        return
+    first, last = timeline.span
+
+    # 집계 단위별 (간격, 자정 기준 시작 오프셋)
+    resolutions = {"일": (pd.Timedelta(days=1), pd.Timedelta(0)), "시간": (pd.Timedelta(hours=1), pd.Timedelta(0))}
+    if shift is not None:
+        resolutions["SHIFT"] = (shift[1], shift[0])
+    resolution = st.radio("집계 단위를 선택하세요", list(resolutions), horizontal=True, key=f"wip_resolution_{key}")
+    step, origin = resolutions[resolution]
+    series = timeline.series(step, origin)
+    st.plotly_chart(create_wip_chart(series, key, f"{key}별 {resolution} 단위 대기 재공 수량", x_col="DATETIME"))
+
+    # 특정 시점의 key별 대기 재공 수량
+    col1, col2 = st.columns(2)
+    selected_date = col1.date_input("조회 날짜", value=first.date(), min_value=first.date(),
+                                    max_value=last.date(), key=f"wip_date_{key}")
+    selected_time = col2.time_input("조회 시각", value=time(0, 0), key=f"wip_time_{key}")
+    timestamp = datetime.combine(selected_date, selected_time)
+    st.write(f"{timestamp:%Y-%m-%d %H:%M} 시점 {key}별 대기 재공 수량")
+    st.dataframe(timeline.at(timestamp))
+
+
+def create_wip_chart(grouped, key, title, x_col="EVENT_DATETIME"):
+    """key별 날짜별 잔여 재공 수량 선 그래프 생성 (한 번의 groupby로 모든 trace 구성)"""
+    fig = go.Figure()
+    for value, data in grouped.groupby(key, sort=False, observed=True):
+        fig.add_trace(go.Scatter(
+            x=data[x_col],
+            y=data["WAITING_WIP_QTY"],
+            mode="lines+markers",
+            name=f"{key}: {value}"
+        ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title="날짜",
+        yaxis_title="잔여 재공 수량",
+        legend_title=key
+    )
+    return fig
@@ -0,0 +1,60 @@
+import os
+import struct
+import zipfile
+
+import pyarrow as pa
+
+# ZIP 로컬 파일 헤더 구조 (파일명/extra 필드 길이를 읽어 실제 데이터 위치를 계산)
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIZE = _LOCAL_HEADER.size
+_FILENAME_LENGTH = 10
+_EXTRA_FIELD_LENGTH = 11
+
+
+class ZipMember:
+    """ZIP 안의 .parquet 멤버를 추출 없이 pyarrow에 넘겨주는 핸들"""
+
+    def __init__(self, archive, info, data_offset):
+        self.archive = archive
+        self.name = info.filename
+        self.compress_type = info.compress_type
+        self.file_size = info.file_size
+        self.compress_size = info.compress_size
+        self.data_offset = data_offset
+        # 중앙 디렉터리의 CRC32와 크기 (재업로드 시 내용이 같은 멤버를 알아보는 지문)
+        self.fingerprint = (info.CRC, info.file_size)
+
+    def open(self):
+        """무압축 멤버는 메모리 맵 뷰로, 압축 멤버는 메모리 버퍼로 반환"""
+        if self.compress_type == zipfile.ZIP_STORED:
+            mapped = pa.memory_map(self.archive, "r")
+            return pa.BufferReader(mapped.read_at(self.file_size, self.data_offset))
+
+        with zipfile.ZipFile(self.archive, "r") as zipf:
+            return pa.BufferReader(zipf.read(self.name))
+
+    def __repr__(self):
+        return f"ZipMember({os.path.basename(self.archive)}!{self.name})"
+
+
+def _data_offset(fp, info):
+    fp.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(fp.read(_LOCAL_HEADER_SIZE))
+    return (
+        info.header_offset
+        + _LOCAL_HEADER_SIZE
+        + header[_FILENAME_LENGTH]
+        + header[_EXTRA_FIELD_LENGTH]
+    )
+
+
+def index_parquet_members(zip_path):
+    """ZIP 파일에서 .parquet 멤버를 재귀적으로 찾아 {파일명: ZipMember} 형태로 반환하는 함수"""
+    found_files = {}
+    with zipfile.ZipFile(zip_path, "r") as zipf, open(zip_path, "rb") as fp:
+        for info in zipf.infolist():
+            if info.is_dir() or not info.filename.endswith(".parquet"):
+                continue
+            file = os.path.basename(info.filename)
+            found_files[file] = ZipMember(zip_path, info, _data_offset(fp, info))
+    return found_files